@@ -0,0 +1,80 @@
+"""Add unique clan tag and player name
+
+Revision ID: 9c2f4e1b7a3d
+Revises: 61d131a3f80a
+Create Date: 2026-10-18 10:12:31.482903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "9c2f4e1b7a3d"
+down_revision = "61d131a3f80a"
+branch_labels = None
+depends_on = None
+
+
+def merge_duplicates() -> None:
+    # Rows written before the constraints existed may repeat a clan tag or player
+    # name, keep the first of each and point the rows referencing the others at it
+    op.execute(
+        sa.text(
+            "UPDATE player SET clan_id = ("
+            "SELECT MIN(keep.id) FROM clan AS keep "
+            "JOIN clan AS dup ON dup.tag = keep.tag "
+            "WHERE dup.id = player.clan_id) "
+            "WHERE clan_id NOT IN (SELECT MIN(id) FROM clan GROUP BY tag)"
+        )
+    )
+    op.execute(
+        sa.text(
+            "DELETE FROM clan WHERE id NOT IN (SELECT MIN(id) FROM clan GROUP BY tag)"
+        )
+    )
+
+    # The kept player takes the latest known clan, as the upsert of a player does
+    op.execute(
+        sa.text(
+            "UPDATE player SET clan_id = ("
+            "SELECT dup.clan_id FROM player AS dup "
+            "WHERE dup.name = player.name AND dup.clan_id IS NOT NULL "
+            "ORDER BY dup.id DESC LIMIT 1) "
+            "WHERE id IN ("
+            "SELECT MIN(id) FROM player GROUP BY name HAVING COUNT(*) > 1)"
+        )
+    )
+    op.execute(
+        sa.text(
+            "UPDATE player_match_result SET player_id = ("
+            "SELECT MIN(keep.id) FROM player AS keep "
+            "JOIN player AS dup ON dup.name = keep.name "
+            "WHERE dup.id = player_match_result.player_id) "
+            "WHERE player_id NOT IN (SELECT MIN(id) FROM player GROUP BY name)"
+        )
+    )
+    op.execute(
+        sa.text(
+            "DELETE FROM player WHERE id NOT IN (SELECT MIN(id) FROM player GROUP BY name)"
+        )
+    )
+
+
+def upgrade() -> None:
+    merge_duplicates()
+
+    # Targets of the ON CONFLICT upserts of clans and players
+    with op.batch_alter_table("clan") as batch_op:
+        batch_op.create_unique_constraint("clan_tag_key", ["tag"])
+
+    with op.batch_alter_table("player") as batch_op:
+        batch_op.create_unique_constraint("player_name_key", ["name"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("player") as batch_op:
+        batch_op.drop_constraint("player_name_key", type_="unique")
+
+    with op.batch_alter_table("clan") as batch_op:
+        batch_op.drop_constraint("clan_tag_key", type_="unique")
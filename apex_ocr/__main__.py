@@ -1,10 +1,10 @@
+import asyncio
 import logging
-import time
 from datetime import datetime
 from pathlib import Path
+from typing import List
 
 import click
-from PIL import Image
 from rich.logging import RichHandler
 from rich.progress import (
     BarColumn,
@@ -16,60 +16,179 @@ from rich.progress import (
     TimeRemainingColumn,
 )
 
-from apex_ocr.config import IMAGE_EXTENSIONS, LOG_DIRECTORY
+from apex_ocr import utils
+from apex_ocr.backends import LazyBackend
+from apex_ocr.config import (
+    DAEMON_SOCKET,
+    DEDUPE,
+    IMAGE_EXTENSIONS,
+    LOG_DIRECTORY,
+    make_directories,
+)
+from apex_ocr.daemon import OCRDaemon, OCRDaemonClient
+from apex_ocr.dedupe import DuplicateIndex
 from apex_ocr.engine import ApexOCREngine
-from apex_ocr.roi import scale_rois
+from apex_ocr.manifest import ScreenshotManifest
+from apex_ocr.pipeline import ScreenshotPipeline
 
 logging.captureWarnings(True)
 logger = logging.getLogger(__name__)
 
 
+def get_file_list(file_path: Path) -> List[Path]:
+    if file_path.is_file():
+        return [file_path]
+    elif file_path.is_dir():
+        return sorted(
+            [
+                path
+                for path in file_path.iterdir()
+                if path.is_file() and path.suffix in IMAGE_EXTENSIONS
+            ]
+        )
+    return []
+
+
+def create_progress() -> Progress:
+    return Progress(
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        MofNCompleteColumn(),
+        TaskProgressColumn(),
+        TimeElapsedColumn(),
+        TimeRemainingColumn(),
+    )
+
+
 @click.command()
 @click.argument("filepath", required=False, type=click.Path(exists=True))
 @click.option("-d", "--debug", is_flag=True, show_default=True, default=False)
-def main(filepath: str, debug: bool):
-    ocr_engine = ApexOCREngine()
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    show_default=True,
+    default=1,
+    help="Number of worker processes for directories of screenshots, "
+    "or of engines kept loaded with --serve",
+)
+@click.option(
+    "--serve",
+    is_flag=True,
+    default=False,
+    help="Run a daemon that keeps engines loaded and performs OCR for --connect",
+)
+@click.option(
+    "--connect",
+    is_flag=True,
+    default=False,
+    help="Send screenshots to a running daemon instead of loading an engine",
+)
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    show_default=True,
+    default=DAEMON_SOCKET,
+    help="Unix socket of the daemon",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    default=False,
+    help="Process screenshots again even if an earlier run processed them",
+)
+def main(
+    filepath: str,
+    debug: bool,
+    workers: int,
+    serve: bool,
+    connect: bool,
+    socket_path: Path,
+    force: bool,
+):
+    if serve:
+        OCRDaemon(socket_path, workers, debug).run()
+        return
 
-    if filepath:
-        file_path = Path(filepath)
-        file_list = []
-
-        if file_path.is_file():
-            file_list = [file_path]
-        elif file_path.is_dir():
-            file_list = sorted(
-                [
-                    path
-                    for path in file_path.iterdir()
-                    if path.is_file() and path.suffix in IMAGE_EXTENSIONS
-                ]
-            )
+    if connect:
+        if not filepath:
+            raise click.UsageError("--connect requires a screenshot or directory")
+
+        file_list = get_file_list(Path(filepath))
+        client = OCRDaemonClient(socket_path)
 
-        with Progress(
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            MofNCompleteColumn(),
-            TaskProgressColumn(),
-            TimeElapsedColumn(),
-            TimeRemainingColumn(),
-        ) as pb:
+        with create_progress() as pb:
             task1 = pb.add_task("Processing screenshots...", total=len(file_list))
 
-            for screenshot_path in file_list:
-                logger.info(f"Performing OCR on {screenshot_path.name}...")
-                ocr_engine.process_screenshot(screenshot_path, debug)
+            for response in client.process_files(file_list):
+                if "error" in response:
+                    logger.error(
+                        f"OCR failed for {response['path']}: {response['error']}"
+                    )
+                elif response["results"]:
+                    utils.display_results(response["results"])
 
                 pb.update(task1, advance=1)
+        return
+
+    if filepath:
+        file_list = get_file_list(Path(filepath))
+        manifest = ScreenshotManifest()
+
+        if not force:
+            n_files = len(file_list)
+            file_list = manifest.unprocessed(file_list)
+
+            if len(file_list) < n_files:
+                logger.info(
+                    f"Skipping {n_files - len(file_list)} screenshots processed by "
+                    f"earlier runs, use --force to process them again"
+                )
+
+        if not file_list:
+            logger.info("No new screenshots to process")
+            return
+
+        workers = min(workers, len(file_list)) or 1
+        if workers > 1:
+            logger.info(f"Performing OCR with {workers} workers...")
+
+            # Worker processes load their own models, this engine only persists
+            ocr_engine = ApexOCREngine(
+                parallel=False, backend=LazyBackend(ApexOCREngine.create_backend)
+            )
+        else:
+            ocr_engine = ApexOCREngine()
+
+        with create_progress() as pb:
+            task1 = pb.add_task("Processing screenshots...", total=len(file_list))
+
+            duplicate_index = DuplicateIndex() if DEDUPE else None
+            pipeline = ScreenshotPipeline(
+                ocr_engine,
+                workers,
+                debug=debug,
+                duplicate_index=duplicate_index,
+                manifest=manifest,
+            )
+            asyncio.run(
+                pipeline.process_files(
+                    file_list, lambda *_: pb.update(task1, advance=1)
+                )
+            )
 
     else:
+        ocr_engine = ApexOCREngine()
         logger.info("Watching screen...")
 
-        while True:
-            ocr_engine.process_screenshot(debug=debug)
-            time.sleep(3)
+        pipeline = ScreenshotPipeline(ocr_engine, debug=debug)
+        asyncio.run(pipeline.watch())
 
 
 if __name__ == "__main__":
+    make_directories()
+
     # Configure logger
     file_handler = logging.FileHandler(
         LOG_DIRECTORY
@@ -0,0 +1,197 @@
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Protocol, Tuple
+
+import numpy as np
+import yaml
+
+from apex_ocr.cache import array_digest
+from apex_ocr.config import (
+    OCR_CPU_THREADS,
+    OCR_ENABLE_MKLDNN,
+    OCR_PROFILE_FILE,
+    OCR_REC_BATCH_NUM,
+    OCR_USE_GPU,
+)
+from apex_ocr.preprocessing import grayscale_to_bgr
+
+logger = logging.getLogger(__name__)
+
+# Settings of the PaddleOCR backend that can be saved in the OCR profile
+PROFILE_SETTINGS = ["cpu_threads", "enable_mkldnn", "rec_batch_num", "use_gpu"]
+
+
+class OCRBackend(Protocol):
+    """Text recognition used by the engine.
+
+    Images are preprocessed grayscale or BGR arrays, texts are returned with their
+    recognition confidence.
+    """
+
+    def recognize(self, images: List[np.ndarray]) -> List[Tuple[str, float]]:
+        """Recognize the text of images that each contain a single line of text."""
+        ...
+
+    def detect(self, image: np.ndarray) -> List[Tuple[str, float]]:
+        """Detect and recognize every line of text in an image."""
+        ...
+
+
+def load_ocr_profile(profile_file: Optional[Path] = OCR_PROFILE_FILE) -> dict:
+    if profile_file is None or not profile_file.is_file():
+        return {}
+
+    with open(profile_file) as f:
+        profile = yaml.safe_load(f) or {}
+
+    unknown = set(profile) - set(PROFILE_SETTINGS)
+    if unknown:
+        logger.warning(f"Ignoring unknown OCR profile settings: {sorted(unknown)}")
+
+    profile = {k: v for k, v in profile.items() if k in PROFILE_SETTINGS}
+    logger.debug(f"Loaded OCR profile {profile_file}: {profile}")
+
+    return profile
+
+
+def save_ocr_profile(profile: dict, profile_file: Path = OCR_PROFILE_FILE) -> None:
+    with open(profile_file, "w") as f:
+        yaml.safe_dump(profile, f, sort_keys=False)
+
+
+class PaddleOCRBackend:
+    """PaddleOCR detection and recognition models.
+
+    The angle classifier is never used on the upright summary screen, so it is not
+    loaded. Settings left as None keep the PaddleOCR defaults.
+    """
+
+    def __init__(
+        self,
+        cpu_threads: Optional[int] = OCR_CPU_THREADS,
+        enable_mkldnn: Optional[bool] = OCR_ENABLE_MKLDNN,
+        rec_batch_num: Optional[int] = OCR_REC_BATCH_NUM,
+        use_gpu: Optional[bool] = OCR_USE_GPU,
+    ) -> None:
+        # Imported on first use, loading paddle takes seconds
+        from paddleocr import PaddleOCR
+
+        self.settings = {
+            "cpu_threads": cpu_threads,
+            "enable_mkldnn": enable_mkldnn,
+            "rec_batch_num": rec_batch_num,
+            "use_gpu": use_gpu,
+        }
+
+        self.paddle_ocr = PaddleOCR(
+            use_angle_cls=False,
+            lang="en",
+            show_log=False,
+            debug=False,
+            **{k: v for k, v in self.settings.items() if v is not None},
+        )
+
+    @classmethod
+    def from_profile(
+        cls, profile_file: Optional[Path] = OCR_PROFILE_FILE
+    ) -> "PaddleOCRBackend":
+        # Settings tuned for this machine take precedence over the config
+        return cls(**load_ocr_profile(profile_file))
+
+    def recognize(self, images: List[np.ndarray]) -> List[Tuple[str, float]]:
+        if not images:
+            return []
+
+        # Recognizer expects 3 channel images and batches them internally
+        rec_res, _ = self.paddle_ocr.text_recognizer(
+            [grayscale_to_bgr(img) for img in images]
+        )
+
+        return [(text, float(confidence)) for text, confidence in rec_res]
+
+    def detect(self, image: np.ndarray) -> List[Tuple[str, float]]:
+        result = self.paddle_ocr.ocr(image, det=True, rec=True, cls=False)[0]
+
+        # Nothing is returned when no text is detected
+        return [(text, float(confidence)) for _, (text, confidence) in result or []]
+
+
+class LazyBackend:
+    """Backend that is only created by ``backend_factory`` when it is first used.
+
+    Lets an engine that only persists results, such as the one of the main process
+    when worker processes perform OCR, avoid loading a model it never runs.
+    """
+
+    def __init__(self, backend_factory: Callable[[], OCRBackend]) -> None:
+        self.backend_factory = backend_factory
+        self.backend: Optional[OCRBackend] = None
+        self.lock = threading.Lock()
+
+    def get_backend(self) -> OCRBackend:
+        with self.lock:
+            if self.backend is None:
+                logger.debug("Loading OCR backend on first use")
+                self.backend = self.backend_factory()
+
+        return self.backend
+
+    def recognize(self, images: List[np.ndarray]) -> List[Tuple[str, float]]:
+        return self.get_backend().recognize(images)
+
+    def detect(self, image: np.ndarray) -> List[Tuple[str, float]]:
+        return self.get_backend().detect(image)
+
+
+class StubBackend:
+    """Backend that reads registered texts without loading a model.
+
+    Texts are registered for the exact preprocessed images the engine passes to the
+    backend, any other image is read as the default text. Used to measure and
+    exercise everything around the model deterministically and offline. Each call
+    can be given a latency to stand in for the time taken by a model.
+    """
+
+    def __init__(
+        self, default_text: str = "", confidence: float = 1.0, latency: float = 0.0
+    ) -> None:
+        self.default_text = default_text
+        self.confidence = confidence
+        self.latency = latency
+
+        self.texts: Dict[str, str] = {}
+        self.n_calls = 0
+        self.n_images = 0
+
+    @staticmethod
+    def image_key(image: np.ndarray) -> str:
+        # Grayscale images may be passed as 3 identical channels
+        if image.ndim == 3:
+            image = image[..., 0]
+        return array_digest(image)
+
+    def register(self, image: np.ndarray, text: str) -> None:
+        self.texts[self.image_key(image)] = text
+
+    def read(self, image: np.ndarray) -> Tuple[str, float]:
+        return self.texts.get(self.image_key(image), self.default_text), self.confidence
+
+    def recognize(self, images: List[np.ndarray]) -> List[Tuple[str, float]]:
+        self.n_calls += 1
+        self.n_images += len(images)
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        return [self.read(image) for image in images]
+
+    def detect(self, image: np.ndarray) -> List[Tuple[str, float]]:
+        self.n_calls += 1
+        self.n_images += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        return [self.read(image)]
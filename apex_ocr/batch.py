@@ -0,0 +1,28 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from apex_ocr.engine import ApexOCREngine
+
+# OCR engine loaded once by each worker process
+_worker_engine = None
+
+
+def init_worker() -> None:
+    global _worker_engine
+
+    # Workers only perform OCR, results are saved by the parent process
+    _worker_engine = ApexOCREngine(database=False)
+
+
+def ocr_worker(screenshot_path: Path, debug: bool = False) -> dict:
+    return _worker_engine.ocr_screenshot(screenshot_path, debug)
+
+
+def create_worker_pool(workers: int) -> ProcessPoolExecutor:
+    # Spawn fresh workers rather than forking a process with a loaded model
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+    )
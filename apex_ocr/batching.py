@@ -0,0 +1,166 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from apex_ocr.backends import OCRBackend
+from apex_ocr.config import BATCH_MAX_QUEUE, BATCH_MAX_SIZE, BATCH_MAX_WAIT
+
+logger = logging.getLogger(__name__)
+
+
+class BatchRequest:
+    def __init__(self, images: List[np.ndarray]) -> None:
+        self.images = images
+        self.future: Future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class BatchingBackend:
+    """Backend that merges concurrent recognitions into batches of one backend.
+
+    Threads calling ``recognize`` queue their images and wait. A dispatcher thread
+    gathers the queued requests until ``max_batch_size`` images are collected or
+    ``max_wait`` seconds have passed since the first one, recognizes them in a single
+    call and hands every request its own results. A full queue blocks new requests
+    until the backend catches up.
+    """
+
+    def __init__(
+        self,
+        backend: OCRBackend,
+        max_batch_size: int = BATCH_MAX_SIZE,
+        max_wait: float = BATCH_MAX_WAIT,
+        max_queue: int = BATCH_MAX_QUEUE,
+    ) -> None:
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+
+        self.requests: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.closed = False
+
+        # The wrapped backend is only ever used by one thread at a time
+        self.backend_lock = threading.Lock()
+
+        self.metrics_lock = threading.Lock()
+        self.n_batches = 0
+        self.n_requests = 0
+        self.n_images = 0
+        self.largest_batch = 0
+        self.total_wait = 0.0
+
+        self.dispatcher = threading.Thread(
+            target=self.dispatch, name="apex_ocr_batcher", daemon=True
+        )
+        self.dispatcher.start()
+
+    def recognize(self, images: List[np.ndarray]) -> List[Tuple[str, float]]:
+        if not images:
+            return []
+
+        request = BatchRequest(images)
+        self.requests.put(request)
+
+        return request.future.result()
+
+    def detect(self, image: np.ndarray) -> List[Tuple[str, float]]:
+        # Detection is rare and runs on whole images, it is not batched
+        with self.backend_lock:
+            return self.backend.detect(image)
+
+    def collect(
+        self, first: BatchRequest
+    ) -> Tuple[List[BatchRequest], Optional[BatchRequest]]:
+        # Gather requests until the batch is full or the first request waited enough
+        batch = [first]
+        n_images = len(first.images)
+        deadline = first.enqueued + self.max_wait
+
+        while n_images < self.max_batch_size:
+            # Past the deadline, still take the requests that are already waiting
+            timeout = max(deadline - time.perf_counter(), 0)
+
+            try:
+                request = self.requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+
+            if request is None:
+                self.closed = True
+                break
+
+            if n_images + len(request.images) > self.max_batch_size:
+                # Left for the next batch
+                return batch, request
+
+            batch.append(request)
+            n_images += len(request.images)
+
+        return batch, None
+
+    def dispatch(self) -> None:
+        carried = None
+
+        while carried is not None or not self.closed:
+            request = carried if carried is not None else self.requests.get()
+            if request is None:
+                break
+
+            batch, carried = self.collect(request)
+            self.run_batch(batch)
+
+    def run_batch(self, batch: List[BatchRequest]) -> None:
+        images = [image for request in batch for image in request.images]
+        started = time.perf_counter()
+
+        try:
+            with self.backend_lock:
+                texts = self.backend.recognize(images)
+        except Exception as e:
+            logger.error(f"Failed to recognize a batch of {len(images)} images: {e}")
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        # Hand back the results of every request in the order of its images
+        start = 0
+        for request in batch:
+            end = start + len(request.images)
+            request.future.set_result(texts[start:end])
+            start = end
+
+        with self.metrics_lock:
+            self.n_batches += 1
+            self.n_requests += len(batch)
+            self.n_images += len(images)
+            self.largest_batch = max(self.largest_batch, len(images))
+            self.total_wait += sum(started - request.enqueued for request in batch)
+
+    def metrics(self) -> dict:
+        with self.metrics_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait": self.max_wait,
+                "max_queue": self.max_queue,
+                "queue_depth": self.requests.qsize(),
+                "batches": self.n_batches,
+                "requests": self.n_requests,
+                "images": self.n_images,
+                "largest_batch": self.largest_batch,
+                "mean_batch_size": (
+                    self.n_images / self.n_batches if self.n_batches else 0.0
+                ),
+                "mean_wait": (
+                    self.total_wait / self.n_requests if self.n_requests else 0.0
+                ),
+            }
+
+    def close(self) -> None:
+        self.requests.put(None)
+        self.dispatcher.join()
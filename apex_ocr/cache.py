@@ -0,0 +1,76 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+import numpy as np
+
+
+def array_digest(image: np.ndarray) -> str:
+    """Compute a fast content hash of an image array.
+
+    Args:
+        image (np.ndarray): Input image array.
+
+    Returns:
+        str: Hash string. Byte-identical arrays with the same shape and dtype share a hash.
+    """
+    m = hashlib.blake2b(digest_size=16)
+    m.update(f"{image.shape}{image.dtype.str}".encode("utf-8"))
+    m.update(np.ascontiguousarray(image).data)
+    return m.hexdigest()
+
+
+class LRUCache:
+    """Thread-safe, bounded least-recently-used cache with hit/miss counters."""
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+
+            # Evict least recently used entries
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses, {len(self)}/{self.maxsize} entries"
@@ -1,5 +1,6 @@
 import logging
 import re
+import tempfile
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -9,20 +10,109 @@ IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png"]
 
 # Path to log directory
 LOG_DIRECTORY = Path(__file__).parent.parent / "logs"
-LOG_DIRECTORY.mkdir(parents=True, exist_ok=True)
 
 # Path to data
 DATA_DIRECTORY = Path(__file__).parent.parent / "data"
-DATA_DIRECTORY.mkdir(parents=True, exist_ok=True)
 
 GOOGLE_DRIVE_DIRECTORY = Path(__file__).parent.parent / "data" / "google_drive"
-GOOGLE_DRIVE_DIRECTORY.mkdir(parents=True, exist_ok=True)
 
 SQUAD_STATS_FILE = DATA_DIRECTORY / "squad_stats.csv"
+# Results are appended to the CSV file every CSV_FLUSH_SIZE results, or once the
+# oldest buffered result is CSV_FLUSH_INTERVAL seconds old
+CSV_FLUSH_SIZE = 32
+CSV_FLUSH_INTERVAL = 10
+
+# Also write results to a Parquet dataset partitioned by month, requires pyarrow
+PARQUET_OUTPUT = False
+PARQUET_DIRECTORY = DATA_DIRECTORY / "squad_stats"
+# Results are written to a new file of the Parquet dataset every
+# PARQUET_ROW_GROUP_SIZE results, or once the oldest buffered result is
+# PARQUET_FLUSH_INTERVAL seconds old
+PARQUET_ROW_GROUP_SIZE = 256
+PARQUET_FLUSH_INTERVAL = 60
 
 # Database output
 DATABASE = True
 DATABASE_YML_FILE = Path(__file__).parent.parent / "db.yml"
 
+# OCR model settings, None keeps the PaddleOCR default
+# Settings saved by `python -m apex_ocr.tune` in OCR_PROFILE_FILE take precedence
+OCR_CPU_THREADS = None
+OCR_ENABLE_MKLDNN = None
+OCR_REC_BATCH_NUM = None
+OCR_USE_GPU = None
+OCR_PROFILE_FILE = Path(__file__).parent.parent / "ocr_profile.yml"
+
+# Maximum number of OCR results cached by preprocessed image content
+OCR_CACHE_SIZE = 4096
+
+# Maximum number of player and clan ids cached by name and tag by the database api
+IDENTITY_CACHE_SIZE = 1024
+
+# Stop running blur passes on a region once enough passes agree on its text,
+# or a single pass recognizes it with at least the given confidence
+ADAPTIVE_VOTING = True
+VOTE_QUORUM = 2
+VOTE_CONFIDENCE = 0.95
+
+# Recognize numeric stats by matching glyphs of the game font, which are learned
+# from confident PaddleOCR results. Falls back to PaddleOCR below the confidence
+DIGIT_RECOGNIZER = True
+DIGIT_MIN_CONFIDENCE = 0.9
+DIGIT_GLYPHS_FILE = DATA_DIRECTORY / "digit_glyphs.npz"
+
+# Skip OCR on watched frames that do not look like a learned summary page
+# Every Nth rejected frame is still classified with OCR to learn new variants
+SUMMARY_GATE = True
+SUMMARY_GATE_THRESHOLD = 0.6
+SUMMARY_GATE_AUDIT_INTERVAL = 20
+SUMMARY_TEMPLATES_FILE = DATA_DIRECTORY / "summary_templates.npy"
+
+# Reuse results of a watched frame whose fingerprint is within the given
+# number of bits of a frame processed in the last FRAME_MEMO_TTL seconds
+FINGERPRINT_MAX_DISTANCE = 16
+FRAME_MEMO_TTL = 60
+
+# Skip screenshots within DEDUPE_MAX_DISTANCE bits of the fingerprint of a
+# screenshot that already produced results, and whose region thumbnails are within
+# DEDUPE_MAX_PIXEL_DIFFERENCE gray levels of its own, before performing OCR
+DEDUPE = True
+DEDUPE_INDEX_FILE = DATA_DIRECTORY / "fingerprints.db"
+DEDUPE_MAX_DISTANCE = 8
+DEDUPE_MAX_PIXEL_DIFFERENCE = 6
+
+# Outcome of every processed screenshot, screenshots already processed are skipped
+MANIFEST_FILE = DATA_DIRECTORY / "manifest.db"
+
 # Parallel run settings
+# Each thread loads its own recognizer the first time it is used
 PARALLEL = False
+PARALLEL_THREADS = 4
+
+# Pipeline settings
+# Maximum number of screenshots waiting between two pipeline stages
+PIPELINE_QUEUE_SIZE = 8
+# Seconds between screen captures in watch mode
+WATCH_INTERVAL = 3
+
+# OCR daemon settings
+DAEMON_SOCKET = Path(tempfile.gettempdir()) / "apex_ocr.sock"
+# Maximum size of one request, screenshots can be sent inline as base64
+DAEMON_MAX_REQUEST_SIZE = 64 * 1024 * 1024
+
+# HTTP server settings
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8000
+# Engines of the server share one model and recognize the regions of concurrent
+# requests in batches of up to BATCH_MAX_SIZE images, waiting at most BATCH_MAX_WAIT
+# seconds for a batch to fill. At most BATCH_MAX_QUEUE requests wait for a batch.
+SERVER_BATCHING = True
+BATCH_MAX_SIZE = 64
+BATCH_MAX_WAIT = 0.005
+BATCH_MAX_QUEUE = 32
+
+
+def make_directories() -> None:
+    # Created by entry points rather than on import
+    for directory in [LOG_DIRECTORY, DATA_DIRECTORY, GOOGLE_DRIVE_DIRECTORY]:
+        directory.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,192 @@
+import asyncio
+import base64
+import io
+import json
+import logging
+import socket
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, List
+
+from PIL import Image
+
+from apex_ocr.config import DAEMON_MAX_REQUEST_SIZE, DAEMON_SOCKET
+from apex_ocr.service import EnginePool
+
+logger = logging.getLogger(__name__)
+
+
+class OCRDaemon:
+    """Long-running OCR service that keeps warm engines loaded.
+
+    Clients connect to a Unix socket and send one JSON request per line:
+
+        {"id": 1, "path": "/abs/path/to/screenshot.png", "save": true}
+        {"id": 2, "image": "<base64 encoded image bytes>"}
+
+    Requests of all connections share a pool of engines. Each request gets one JSON
+    response per line in the order it was sent, with the same id and either the
+    results or an error. Results are saved to the CSV and database unless "save" is
+    false.
+    """
+
+    def __init__(
+        self,
+        socket_path: Path = DAEMON_SOCKET,
+        n_engines: int = 1,
+        debug: bool = False,
+    ) -> None:
+        self.socket_path = socket_path
+        self.n_engines = n_engines
+        self.pool = EnginePool(n_engines, debug)
+
+    def process_request(self, request: dict) -> dict:
+        if "path" in request:
+            image = Path(request["path"])
+        elif "image" in request:
+            image = Image.open(io.BytesIO(base64.b64decode(request["image"])))
+        else:
+            raise ValueError("Request needs a path or an image")
+
+        return self.pool.process(image, request.get("save", True))
+
+    def handle_request(self, request: dict) -> dict:
+        response = {"id": request.get("id"), "path": request.get("path")}
+
+        try:
+            response.update(self.process_request(request))
+        except Exception as e:
+            logger.error(f"Failed to process request {response}: {e}")
+            response["error"] = str(e)
+
+        return response
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        loop = asyncio.get_running_loop()
+
+        # Bounded so that a fast client waits for its responses to be read
+        pending = asyncio.Queue(maxsize=2 * self.n_engines)
+
+        async def respond() -> None:
+            while True:
+                future = await pending.get()
+                if future is None:
+                    break
+
+                response = await future
+                writer.write(json.dumps(response, default=str).encode("utf-8") + b"\n")
+                await writer.drain()
+
+        responder = asyncio.create_task(respond())
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as e:
+                    future = loop.create_future()
+                    future.set_result({"error": f"Invalid request: {e}"})
+                else:
+                    future = loop.run_in_executor(
+                        self.pool.executor, self.handle_request, request
+                    )
+
+                await pending.put(future)
+        except (asyncio.LimitOverrunError, ValueError) as e:
+            logger.error(f"Closing connection with an oversized request: {e}")
+        finally:
+            await pending.put(None)
+            try:
+                await responder
+            except ConnectionError:
+                logger.debug("Client disconnected before reading all responses")
+            writer.close()
+
+    async def serve(self) -> None:
+        # Remove the socket of a daemon that did not shut down cleanly
+        if self.socket_path.is_socket():
+            self.socket_path.unlink()
+
+        server = await asyncio.start_unix_server(
+            self.handle_connection,
+            path=str(self.socket_path),
+            limit=DAEMON_MAX_REQUEST_SIZE,
+        )
+
+        logger.info(f"Serving OCR on {self.socket_path}")
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.socket_path.unlink(missing_ok=True)
+
+    def run(self) -> None:
+        self.pool.load()
+
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            logger.info("Stopped serving OCR")
+        finally:
+            self.pool.shutdown()
+
+
+class OCRDaemonClient:
+    """Client of an OCRDaemon that streams requests and responses."""
+
+    def __init__(self, socket_path: Path = DAEMON_SOCKET) -> None:
+        self.socket_path = socket_path
+
+    @staticmethod
+    def path_request(screenshot_path: Path, save: bool = True) -> dict:
+        # The daemon does not share the working directory of the client
+        return {"path": str(screenshot_path.resolve()), "save": save}
+
+    @staticmethod
+    def image_request(image_bytes: bytes, save: bool = True) -> dict:
+        return {"image": base64.b64encode(image_bytes).decode("ascii"), "save": save}
+
+    def process(self, requests: Iterable[dict]) -> Iterator[dict]:
+        """Send requests to the daemon.
+
+        Args:
+            requests (Iterable[dict]): Requests to send, in order.
+
+        Yields:
+            Iterator[dict]: Response of each request, in the same order.
+        """
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(str(self.socket_path))
+
+            # Send from a thread so that responses are read while requests are sent
+            def send() -> None:
+                try:
+                    with sock.makefile("wb") as f:
+                        for i, request in enumerate(requests):
+                            request.setdefault("id", i)
+                            f.write(json.dumps(request).encode("utf-8") + b"\n")
+                            f.flush()
+                    sock.shutdown(socket.SHUT_WR)
+                except OSError as e:
+                    logger.error(f"Failed to send requests: {e}")
+
+            sender = threading.Thread(target=send, daemon=True)
+            sender.start()
+
+            with sock.makefile("rb") as f:
+                for line in f:
+                    yield json.loads(line)
+
+            sender.join()
+
+    def process_files(self, file_list: List[Path], save: bool = True) -> Iterator[dict]:
+        return self.process(
+            self.path_request(screenshot_path, save) for screenshot_path in file_list
+        )
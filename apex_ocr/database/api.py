@@ -1,9 +1,13 @@
 import logging
+from typing import Dict, Optional, Tuple
 
-from sqlalchemy import create_engine
-from sqlalchemy.exc import IntegrityError, DataError
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DataError, IntegrityError, SQLAlchemyError
 from sqlalchemy.orm.session import sessionmaker
 
+from apex_ocr.cache import LRUCache
+from apex_ocr.config import IDENTITY_CACHE_SIZE
 from apex_ocr.utils import time_survived_to_seconds
 
 from .models import Clan, MatchResult, MatchType, Player, PlayerMatchResult
@@ -12,11 +16,50 @@ logger = logging.getLogger(__name__)
 
 
 class ApexDatabaseApi:
-    def __init__(self, db_conn_str) -> None:
+    def __init__(self, db_conn_str, cache_size: int = IDENTITY_CACHE_SIZE) -> None:
         self.engine = create_engine(db_conn_str)
         Session = sessionmaker(bind=self.engine)
         self.session = Session()
 
+        # Ids of clans by tag, and ids and clan ids of players by name
+        self.clan_ids = LRUCache(cache_size)
+        self.player_ids = LRUCache(cache_size)
+        self.warm_cache()
+
+    def warm_cache(self) -> None:
+        # Most recently added clans and players first
+        try:
+            clans = self.session.execute(
+                select(Clan.tag, Clan.id)
+                .order_by(Clan.id.desc())
+                .limit(self.clan_ids.maxsize)
+            ).all()
+            players = self.session.execute(
+                select(Player.name, Player.id, Player.clan_id)
+                .order_by(Player.id.desc())
+                .limit(self.player_ids.maxsize)
+            ).all()
+        except SQLAlchemyError as e:
+            # Tables that do not exist yet
+            logger.debug(f"Failed to warm the identity cache: {e}")
+            self.session.rollback()
+            return
+
+        # Least recently added first, so that they are evicted first
+        for clan_tag, clan_id in reversed(clans):
+            self.clan_ids.put(clan_tag, clan_id)
+        for player_name, player_id, clan_id in reversed(players):
+            self.player_ids.put(player_name, (player_id, clan_id))
+
+        logger.debug(
+            f"Loaded {len(self.clan_ids)} clans and {len(self.player_ids)} players "
+            "into the identity cache"
+        )
+
+    def clear_cache(self) -> None:
+        self.clan_ids.clear()
+        self.player_ids.clear()
+
     def add(self, obj) -> None:
         self.session.add(obj)
         self.session.commit()
@@ -33,85 +76,134 @@ class ApexDatabaseApi:
         self.session.query(Player).delete()
         self.session.query(PlayerMatchResult).delete()
         self.session.commit()
+        self.clear_cache()
+
+    def insert(self, model):
+        # Dialect specific insert that supports ON CONFLICT
+        if self.engine.dialect.name == "postgresql":
+            return postgresql.insert(model)
+        elif self.engine.dialect.name == "sqlite":
+            return sqlite.insert(model)
+
+        raise NotImplementedError(
+            f"Upserts are not supported for the {self.engine.dialect.name} dialect, "
+            "only postgresql and sqlite"
+        )
+
+    def upsert_clan(self, clan_tag: str) -> int:
+        stmt = self.insert(Clan).values(tag=clan_tag)
+        # No-op update so that the id of an existing clan is returned
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Clan.tag], set_={"tag": stmt.excluded.tag}
+        ).returning(Clan.id)
+        return self.session.execute(stmt).scalar_one()
+
+    def upsert_player(
+        self, player_name: str, clan_id: Optional[int]
+    ) -> Tuple[int, Optional[int]]:
+        stmt = self.insert(Player).values(name=player_name, clan_id=clan_id)
+        # Update the clan of an existing player, unless the new one is unknown
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Player.name],
+            set_={"clan_id": func.coalesce(stmt.excluded.clan_id, Player.clan_id)},
+        ).returning(Player.id, Player.clan_id)
+        return tuple(self.session.execute(stmt).one())
 
     def push_results(self, results: dict) -> None:
-        # TODO: Handle different match types
-        # Commit match result
-        match_result = MatchResult(
-            datetime=results["Datetime"],
-            match_type=MatchType.BATTLE_ROYALE,
-            place=results["Place"],
-            hash=results["Hash"],
-        )
+        """Write the results of a match and its players in a single transaction.
+
+        Clans and players are upserted, unless their id is cached and the clan of
+        the player is unchanged. Matches whose hash is already in the database are
+        skipped. A match that conflicts with the cached ids is written again with
+        fresh upserts, errors are raised once the transaction is rolled back.
+        """
+        player_results = {}
+
+        for p_num in ["P1", "P2", "P3"]:
+            try:
+                # Convert string time format to seconds
+                time_survived = time_survived_to_seconds(
+                    results[f"{p_num} Time Survived"]
+                )
+            except ValueError as e:
+                logger.error(e)
+                return
+
+            player_results[p_num] = {
+                "kills": results[f"{p_num} Kills"],
+                "assists": results[f"{p_num} Assists"],
+                "knockdowns": results[f"{p_num} Knocks"],
+                "damage": results[f"{p_num} Damage"],
+                "survival_time": time_survived,
+                "revives": results[f"{p_num} Revives"],
+                "respawns": results[f"{p_num} Respawns"],
+            }
 
         try:
-            self.add(match_result)
-        except IntegrityError:
+            self.write_match(results, player_results)
+        except IntegrityError as e:
+            self.session.rollback()
+            # Cached ids may belong to rows that no longer exist
+            self.clear_cache()
+            logger.warning(f"Writing match again without cached ids: {e}")
+
+            try:
+                self.write_match(results, player_results)
+            except (IntegrityError, DataError):
+                self.session.rollback()
+                raise
+        except DataError:
+            self.session.rollback()
+            raise
+
+    def write_match(self, results: dict, player_results: Dict[str, dict]) -> None:
+        # TODO: Handle different match types
+        match_id = self.session.execute(
+            self.insert(MatchResult)
+            .values(
+                datetime=results["Datetime"],
+                match_type=MatchType.BATTLE_ROYALE,
+                place=results["Place"],
+                hash=results["Hash"],
+            )
+            .on_conflict_do_nothing(index_elements=[MatchResult.hash])
+            .returning(MatchResult.id)
+        ).scalar_one_or_none()
+
+        if match_id is None:
             logger.info("Duplicate match results found in database!")
             self.session.rollback()
             return
 
-        # Batch add player match result objects
-        add_list = []
+        # Ids of the clans and players of the match, cached once committed
+        clan_ids: Dict[str, int] = {}
+        player_ids: Dict[str, Tuple[int, Optional[int]]] = {}
 
-        for p_num in ["P1", "P2", "P3"]:
-            # Commit clan if not already in database
+        for p_num, player_result in player_results.items():
             clan_tag = results[f"{p_num} Clan"]
+            clan_id = None
 
             if clan_tag:
-                clan = self.session.query(Clan).filter_by(tag=clan_tag).first()
-
-                if clan is None:
-                    clan = Clan(tag=clan_tag)
-                    self.add(clan)
-            else:
-                clan = None
+                clan_id = clan_ids.get(clan_tag) or self.clan_ids.get(clan_tag)
+                if clan_id is None:
+                    clan_id = self.upsert_clan(clan_tag)
+                clan_ids[clan_tag] = clan_id
 
-            # Commit player if not already in database
             player_name = results[p_num]
-            player = self.session.query(Player).filter_by(name=player_name).first()
+            player = player_ids.get(player_name) or self.player_ids.get(player_name)
+            if player is None or clan_id not in (None, player[1]):
+                player = self.upsert_player(player_name, clan_id)
+            player_ids[player_name] = player
 
-            if player is None:
-                if clan:
-                    player = Player(name=player_name, clan_id=clan.id)
-                else:
-                    player = Player(name=player_name)
+            player_result["player_id"], _ = player
+            player_result["match_id"] = match_id
 
-                self.add(player)
-            else:
-                if clan:
-                    # Update clan information
-                    player.clan_id = clan.id
-                    self.session.commit()
-
-            try:
-                # Convert string time format to seconds
-                time_survived = time_survived_to_seconds(
-                    results[f"{p_num} Time Survived"]
-                )
-            except ValueError as e:
-                logger.error(e)
-                break
-
-            # Create match player result object to add to database
-            player_match_result = PlayerMatchResult(
-                player_id=player.id,
-                match_id=match_result.id,
-                kills=results[f"{p_num} Kills"],
-                assists=results[f"{p_num} Assists"],
-                knockdowns=results[f"{p_num} Knocks"],
-                damage=results[f"{p_num} Damage"],
-                survival_time=time_survived,
-                revives=results[f"{p_num} Revives"],
-                respawns=results[f"{p_num} Respawns"],
-            )
+        self.session.execute(
+            self.insert(PlayerMatchResult).values(list(player_results.values()))
+        )
+        self.session.commit()
 
-            add_list.append(player_match_result)
-        else:
-            # Add match player results if loop did not break
-            try:
-                self.add_all(add_list)
-            except DataError as e:
-                logger.error(e)
-                self.session.rollback()
-                return
+        for clan_tag, clan_id in clan_ids.items():
+            self.clan_ids.put(clan_tag, clan_id)
+        for player_name, player in player_ids.items():
+            self.player_ids.put(player_name, player)
@@ -46,7 +46,7 @@ class Clan(Base):
     __tablename__ = "clan"
 
     id = Column(Integer, primary_key=True)
-    tag = Column(String, nullable=False)
+    tag = Column(String, unique=True, nullable=False)
     name = Column(String)
 
     players = relationship(
@@ -69,7 +69,7 @@ class Player(Base):
 
     id = Column(Integer, primary_key=True)
     clan_id = Column(Integer, ForeignKey("clan.id", ondelete="SET NULL"))
-    name = Column(String, nullable=False)
+    name = Column(String, unique=True, nullable=False)
 
     match_results = relationship(
         "PlayerMatchResult",
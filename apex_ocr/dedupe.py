@@ -0,0 +1,239 @@
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from apex_ocr.config import (
+    DEDUPE_INDEX_FILE,
+    DEDUPE_MAX_DISTANCE,
+    DEDUPE_MAX_PIXEL_DIFFERENCE,
+)
+from apex_ocr.fingerprint import (
+    THUMBNAIL_SIZE,
+    frame_fingerprint,
+    hamming_distance,
+    max_pixel_difference,
+    region_thumbnails,
+)
+from apex_ocr.roi import scale_rois
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ScreenshotFingerprint:
+    """Fingerprint of the stat regions of a screenshot.
+
+    The difference hash finds candidate near-duplicates in the index, and the
+    thumbnails of the regions confirm them.
+    """
+
+    frame_hash: int
+    thumbnails: np.ndarray = field(compare=False, repr=False)
+
+
+def screenshot_fingerprint(image: Image.Image) -> ScreenshotFingerprint:
+    layout = scale_rois(image.size)
+    return ScreenshotFingerprint(
+        frame_hash=frame_fingerprint(image, layout),
+        thumbnails=region_thumbnails(image, layout),
+    )
+
+
+class BKTree:
+    """Burkhard-Keller tree of fingerprints under the Hamming distance.
+
+    Each child of a node is keyed by its distance to the node, so by the triangle
+    inequality a search only visits the children whose key is within the search
+    distance of the distance to the node.
+    """
+
+    def __init__(self) -> None:
+        # Nodes are [fingerprint, value, {distance: child}]
+        self.root = None
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, fingerprint: int, value: str) -> None:
+        self.size += 1
+
+        if self.root is None:
+            self.root = [fingerprint, value, {}]
+            return
+
+        node = self.root
+        while True:
+            distance = hamming_distance(fingerprint, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [fingerprint, value, {}]
+                return
+            node = child
+
+    def search(self, fingerprint: int, max_distance: int) -> Iterator[Tuple[int, str]]:
+        # Distance and value of every fingerprint within max_distance bits
+        nodes = [self.root] if self.root is not None else []
+
+        while nodes:
+            node = nodes.pop()
+            distance = hamming_distance(fingerprint, node[0])
+            if distance <= max_distance:
+                yield distance, node[1]
+
+            nodes.extend(
+                child
+                for child_distance, child in node[2].items()
+                if abs(child_distance - distance) <= max_distance
+            )
+
+
+class DuplicateIndex:
+    """Persistent index of the fingerprints of screenshots that produced results.
+
+    Fingerprints are stored in SQLite and searched in memory with a BK-tree, so a
+    screenshot within ``max_distance`` bits of one already processed, such as a
+    repeated or re-encoded screenshot of the same summary, is skipped before OCR.
+    Every thumbnail pixel of a near-duplicate must also be within
+    ``max_pixel_difference`` of that screenshot, so that another match with stats
+    that differ by a single digit is still processed.
+    """
+
+    def __init__(
+        self,
+        index_file: Path = DEDUPE_INDEX_FILE,
+        max_distance: int = DEDUPE_MAX_DISTANCE,
+        max_pixel_difference: int = DEDUPE_MAX_PIXEL_DIFFERENCE,
+    ) -> None:
+        self.index_file = index_file
+        self.max_distance = max_distance
+        self.max_pixel_difference = max_pixel_difference
+
+        self.tree = BKTree()
+        self.lock = threading.Lock()
+
+        # Used by the load and persist stages of the pipeline
+        self.conn = sqlite3.connect(str(index_file), check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            "fingerprint TEXT NOT NULL, "
+            "path TEXT NOT NULL, "
+            "results_hash TEXT, "
+            "added_at TEXT NOT NULL, "
+            "thumbnails BLOB)"
+        )
+
+        # Indexes created before thumbnails were stored, whose fingerprints are
+        # never confirmed as duplicates
+        columns = [
+            row[1] for row in self.conn.execute("PRAGMA table_info(fingerprints)")
+        ]
+        if "thumbnails" not in columns:
+            self.conn.execute("ALTER TABLE fingerprints ADD COLUMN thumbnails BLOB")
+        self.conn.commit()
+
+        for fingerprint, path in self.conn.execute(
+            "SELECT fingerprint, path FROM fingerprints"
+        ):
+            self.tree.add(int(fingerprint, 16), path)
+
+        logger.debug(f"Loaded {len(self.tree)} fingerprints from {index_file}")
+
+    def is_duplicate(
+        self, fingerprint: ScreenshotFingerprint, other: ScreenshotFingerprint
+    ) -> bool:
+        return hamming_distance(
+            fingerprint.frame_hash, other.frame_hash
+        ) <= self.max_distance and self.thumbnails_match(
+            fingerprint.thumbnails, other.thumbnails
+        )
+
+    def thumbnails_match(
+        self, thumbnails: np.ndarray, other_thumbnails: Optional[np.ndarray]
+    ) -> bool:
+        return (
+            other_thumbnails is not None
+            and thumbnails.shape == other_thumbnails.shape
+            and max_pixel_difference(thumbnails, other_thumbnails)
+            <= self.max_pixel_difference
+        )
+
+    def load_thumbnails(self, path: str) -> Optional[np.ndarray]:
+        row = self.conn.execute(
+            "SELECT thumbnails FROM fingerprints WHERE path = ? "
+            "ORDER BY rowid DESC LIMIT 1",
+            (path,),
+        ).fetchone()
+
+        if row is None or row[0] is None:
+            return None
+
+        return np.frombuffer(row[0], dtype=np.uint8).reshape(
+            -1, THUMBNAIL_SIZE[1], THUMBNAIL_SIZE[0]
+        )
+
+    def find(
+        self, fingerprint: ScreenshotFingerprint, path: Optional[Path] = None
+    ) -> Optional[str]:
+        """Find a screenshot that is a near-duplicate of a fingerprint.
+
+        Args:
+            fingerprint (ScreenshotFingerprint): Fingerprint of the screenshot.
+            path (Optional[Path], optional): Path of the screenshot, which is not a
+                duplicate of itself when processed again. Defaults to None.
+
+        Returns:
+            Optional[str]: Path of the closest duplicate, or None.
+        """
+        with self.lock:
+            matches = sorted(
+                self.tree.search(fingerprint.frame_hash, self.max_distance)
+            )
+
+            for _, match_path in matches:
+                if path is not None and match_path == str(path.resolve()):
+                    continue
+
+                # Only confirmed if the stats of every region match as well
+                if self.thumbnails_match(
+                    fingerprint.thumbnails, self.load_thumbnails(match_path)
+                ):
+                    return match_path
+
+        return None
+
+    def add(
+        self,
+        fingerprint: ScreenshotFingerprint,
+        path: Path,
+        results_hash: Optional[str],
+    ) -> None:
+        path = str(path.resolve())
+
+        with self.lock:
+            # Screenshots that are processed again are already indexed
+            if (0, path) in self.tree.search(fingerprint.frame_hash, 0):
+                return
+
+            self.tree.add(fingerprint.frame_hash, path)
+            self.conn.execute(
+                "INSERT INTO fingerprints VALUES (?, ?, ?, ?, ?)",
+                (
+                    f"{fingerprint.frame_hash:x}",
+                    path,
+                    results_hash,
+                    datetime.utcnow().isoformat(),
+                    fingerprint.thumbnails.tobytes(),
+                ),
+            )
+            self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
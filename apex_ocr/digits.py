@@ -0,0 +1,236 @@
+import logging
+import threading
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from apex_ocr import utils
+from apex_ocr.config import DIGIT_GLYPHS_FILE, DIGIT_MIN_CONFIDENCE
+from apex_ocr.preprocessing import match_template
+
+logger = logging.getLogger(__name__)
+
+# Player stats rendered with the fixed-width numeric font
+NUMERIC_STATS = ["kakn", "damage", "survival_time", "revives", "respawns"]
+
+# Characters that can appear in numeric stats
+DIGIT_CHARACTERS = "0123456789/:"
+
+# Glyphs are scaled to this height and padded to this width, in pixels
+GLYPH_HEIGHT = 24
+GLYPH_WIDTH = 20
+
+# Minimum confidence of the general recognizer to learn glyphs from its result
+CALIBRATION_CONFIDENCE = 0.98
+
+# Minimum lead of the best character over the best different character
+MIN_MARGIN = 0.05
+
+MAX_TEMPLATES_PER_CHARACTER = 4
+
+
+class DigitRecognizer:
+    """Template matching recognizer for the numeric stat regions.
+
+    Thresholded regions are split into glyphs at empty columns, and every glyph is
+    matched against templates of the game font. Templates are calibrated from the
+    general recognizer: when it reads a numeric region with high confidence and the
+    region splits into one glyph per character, each glyph is stored as a template
+    for its character.
+    """
+
+    def __init__(
+        self,
+        glyphs_file: Optional[Path] = DIGIT_GLYPHS_FILE,
+        min_confidence: float = DIGIT_MIN_CONFIDENCE,
+    ) -> None:
+        self.glyphs_file = glyphs_file
+        self.min_confidence = min_confidence
+
+        # Replaced rather than modified by calibration, so recognition can read it
+        # without holding the lock
+        self.templates: Dict[str, List[np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+        if glyphs_file is not None and glyphs_file.is_file():
+            try:
+                self.templates = self.load_templates(glyphs_file)
+            except (OSError, ValueError, EOFError, zipfile.BadZipFile) as e:
+                # Calibrated again from the next confident recognitions
+                logger.warning(f"Failed to load digit templates: {e}")
+            else:
+                logger.debug(
+                    f"Loaded digit templates for {''.join(sorted(self.templates))}"
+                )
+
+    @staticmethod
+    def load_templates(glyphs_file: Path) -> Dict[str, List[np.ndarray]]:
+        templates = {}
+
+        with np.load(glyphs_file) as glyphs:
+            for name in glyphs.files:
+                # Names are the character code followed by the template number
+                character = chr(int(name.split("_")[1]))
+                templates.setdefault(character, []).append(glyphs[name])
+
+        return templates
+
+    @staticmethod
+    def segment(image: np.ndarray) -> List[np.ndarray]:
+        # Text is the minority color of the thresholded region
+        foreground = image > 127
+        if foreground.mean() > 0.5:
+            foreground = ~foreground
+
+        # Split into glyphs at columns without any text
+        columns = np.concatenate([[False], foreground.any(axis=0), [False]])
+        edges = np.flatnonzero(columns[1:] != columns[:-1])
+
+        glyphs = []
+        for start, end in zip(edges[::2], edges[1::2]):
+            glyph = foreground[:, start:end]
+            rows = np.flatnonzero(glyph.any(axis=1))
+            glyphs.append(glyph[rows[0] : rows[-1] + 1])
+
+        return glyphs
+
+    @staticmethod
+    def normalize_glyph(glyph: np.ndarray) -> np.ndarray:
+        # Scale to a fixed height and pad to a fixed width to keep the aspect ratio
+        height, width = glyph.shape
+        width = max(1, min(GLYPH_WIDTH, round(width * GLYPH_HEIGHT / height)))
+
+        resized = cv2.resize(
+            glyph.astype(np.float32),
+            (width, GLYPH_HEIGHT),
+            interpolation=cv2.INTER_AREA,
+        )
+
+        normalized = np.zeros((GLYPH_HEIGHT, GLYPH_WIDTH), dtype=np.float32)
+        offset = (GLYPH_WIDTH - width) // 2
+        normalized[:, offset : offset + width] = resized
+
+        return normalized
+
+    @staticmethod
+    def match_glyph(
+        glyph: np.ndarray, templates: Dict[str, List[np.ndarray]]
+    ) -> Tuple[str, float]:
+        # Best score of every character
+        scores = {
+            character: max(
+                float(np.nan_to_num(match_template(glyph, template)[0, 0]))
+                for template in character_templates
+            )
+            for character, character_templates in templates.items()
+        }
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        character, score = ranked[0]
+
+        if len(ranked) > 1 and score - ranked[1][1] < MIN_MARGIN:
+            return character, 0.0
+
+        return character, score
+
+    def recognize(self, image: np.ndarray) -> Optional[Tuple[str, float]]:
+        """Recognize a thresholded numeric region.
+
+        Args:
+            image (np.ndarray): Thresholded image of the region.
+
+        Returns:
+            Optional[Tuple[str, float]]: Text and confidence, or None if the region
+                cannot be recognized with at least the minimum confidence.
+        """
+        templates = self.templates
+        if not templates:
+            return None
+
+        glyphs = self.segment(image)
+        if not glyphs:
+            return None
+
+        text = ""
+        confidence = 1.0
+
+        for glyph in glyphs:
+            character, score = self.match_glyph(self.normalize_glyph(glyph), templates)
+
+            if score < self.min_confidence:
+                return None
+
+            text += character
+            confidence = min(confidence, score)
+
+        return text, confidence
+
+    def calibrate(self, image: np.ndarray, text: str, confidence: float) -> None:
+        if confidence < CALIBRATION_CONFIDENCE or not text:
+            return
+
+        if any(character not in DIGIT_CHARACTERS for character in text):
+            return
+
+        glyphs = self.segment(image)
+        if len(glyphs) != len(text):
+            return
+
+        learned = False
+
+        with self._lock:
+            templates = {
+                character: list(character_templates)
+                for character, character_templates in self.templates.items()
+            }
+
+            for glyph, character in zip(glyphs, text):
+                glyph = self.normalize_glyph(glyph)
+                character_templates = templates.setdefault(character, [])
+
+                # Skip glyphs that are already well represented
+                if len(character_templates) >= MAX_TEMPLATES_PER_CHARACTER or any(
+                    match_template(glyph, template)[0, 0] >= CALIBRATION_CONFIDENCE
+                    for template in character_templates
+                ):
+                    continue
+
+                character_templates.append(glyph)
+                learned = True
+
+            if not learned:
+                return
+
+            self.templates = templates
+
+            if self.glyphs_file is not None:
+                glyphs_arrays = {
+                    f"glyph_{ord(character)}_{i}": template
+                    for character, character_templates in templates.items()
+                    for i, template in enumerate(character_templates)
+                }
+                utils.replace_file(
+                    self.glyphs_file, lambda f: np.savez(f, **glyphs_arrays)
+                )
+
+        logger.debug(f"Calibrated digit templates from {text}")
+
+
+# One recognizer per glyphs file shared by every engine of the process
+_recognizers: Dict[Optional[Path], DigitRecognizer] = {}
+_recognizers_lock = threading.Lock()
+
+
+def get_digit_recognizer(
+    glyphs_file: Optional[Path] = DIGIT_GLYPHS_FILE,
+) -> DigitRecognizer:
+    with _recognizers_lock:
+        recognizer = _recognizers.get(glyphs_file)
+        if recognizer is None:
+            recognizer = DigitRecognizer(glyphs_file)
+            _recognizers[glyphs_file] = recognizer
+
+    return recognizer
@@ -13,12 +13,14 @@ from rich.progress import (
     TimeRemainingColumn,
 )
 
-from apex_ocr.config import GOOGLE_DRIVE_DIRECTORY
+from apex_ocr.config import GOOGLE_DRIVE_DIRECTORY, make_directories
 
 logger = logging.getLogger("apex_ocr.drive")
 
 
 def download_from_google_drive():
+    make_directories()
+
     gauth = GoogleAuth()
 
     gauth.LoadCredentialsFile("credentials.txt")
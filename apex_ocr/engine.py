@@ -2,28 +2,52 @@ import enum
 import logging
 import re
 from collections import Counter, defaultdict
-from datetime import datetime, timezone
+from datetime import datetime
 from pathlib import Path
-from typing import DefaultDict, List, Tuple, Union
+from typing import TYPE_CHECKING, DefaultDict, List, Optional, Tuple, Union
 
 import numpy as np
 import yaml
-from joblib import Parallel, delayed, parallel_backend
-from paddleocr import PaddleOCR
-from PIL import Image, ImageDraw, ImageGrab
+from PIL import Image, ImageDraw
 
-# Important to mutate roi globals
 from apex_ocr import roi, utils
+from apex_ocr.backends import OCRBackend, PaddleOCRBackend
+from apex_ocr.cache import LRUCache, array_digest
 from apex_ocr.config import (
+    ADAPTIVE_VOTING,
     DATA_DIRECTORY,
     DATABASE,
     DATABASE_YML_FILE,
+    DIGIT_RECOGNIZER,
+    OCR_CACHE_SIZE,
     PARALLEL,
+    PARALLEL_THREADS,
+    PARQUET_DIRECTORY,
+    PARQUET_OUTPUT,
     SQUAD_STATS_FILE,
+    SUMMARY_GATE,
+    VOTE_CONFIDENCE,
+    VOTE_QUORUM,
+    make_directories,
 )
-from apex_ocr.database.api import ApexDatabaseApi
-from apex_ocr.preprocessing import preprocess_image
-from apex_ocr.roi import get_rois, scale_rois
+from apex_ocr.digits import NUMERIC_STATS, get_digit_recognizer
+from apex_ocr.fingerprint import FrameMemo, frame_fingerprint
+from apex_ocr.gate import SummaryGate
+from apex_ocr.parallel import RecognizerPool
+from apex_ocr.preprocessing import (
+    FramePreprocessor,
+    preprocess_image,
+)
+from apex_ocr.roi import RoiLayout, get_rois, scale_rois
+from apex_ocr.writer import (
+    CsvResultWriter,
+    ParquetResultWriter,
+    get_parquet_writer,
+    get_result_writer,
+)
+
+if TYPE_CHECKING:
+    from apex_ocr.database.api import ApexDatabaseApi
 
 logger = logging.getLogger(__name__)
 
@@ -68,10 +92,36 @@ class ApexOCREngine:
         "Hash",
     ]
 
-    def __init__(self, n_images_per_blur: int = 1, blur_levels=[0, 3, 5, 7]) -> None:
-        self.paddle_ocr = PaddleOCR(
-            use_angle_cls=True, lang="en", show_log=False, debug=False
-        )
+    def __init__(
+        self,
+        n_images_per_blur: int = 1,
+        blur_levels=[0, 3, 5, 7],
+        adaptive: bool = ADAPTIVE_VOTING,
+        vote_quorum: int = VOTE_QUORUM,
+        vote_confidence: float = VOTE_CONFIDENCE,
+        database: bool = DATABASE,
+        parallel: bool = PARALLEL,
+        backend: Optional[OCRBackend] = None,
+    ) -> None:
+        make_directories()
+
+        # Load the model unless a backend is given, such as a stub for benchmarks,
+        # which is then shared by the recognizer threads as well
+        if backend is None:
+            self.backend_factory = self.create_backend
+            backend = self.backend_factory()
+        else:
+            self.backend_factory = lambda: backend
+        self.backend = backend
+
+        # Recognizer threads that live as long as the engine
+        if parallel:
+            self.recognizer_pool = self.create_recognizer_pool(PARALLEL_THREADS)
+        else:
+            self.recognizer_pool = None
+
+        # OCR results keyed by the content of the preprocessed image
+        self.ocr_cache = LRUCache(OCR_CACHE_SIZE)
 
         self.blurs = []
         for blur_level in blur_levels:
@@ -79,11 +129,56 @@ class ApexOCREngine:
 
         self.num_images = len(self.blurs)
 
-        if DATABASE:
+        # Early-exit settings for voting on each region of interest
+        self.adaptive = adaptive
+        self.vote_quorum = vote_quorum
+        self.vote_confidence = vote_confidence
+
+        # Results of recently watched frames and hash of the last results handled
+        self.frame_memo = FrameMemo()
+        self.last_results_hash = None
+
+        # Fast recognizer for numeric stats calibrated on the game font, shared by
+        # the engines of the process
+        if DIGIT_RECOGNIZER:
+            self.digit_recognizer = get_digit_recognizer()
+        else:
+            self.digit_recognizer = None
+
+        # Pre-classifier for summary pages while watching the screen
+        if SUMMARY_GATE:
+            self.summary_gate = SummaryGate()
+        else:
+            self.summary_gate = None
+
+        if database:
             self.db_conn = self.get_database_session()
         else:
             self.db_conn = None
 
+    @staticmethod
+    def create_backend() -> OCRBackend:
+        return PaddleOCRBackend.from_profile()
+
+    def create_recognizer_pool(self, n_threads: int) -> RecognizerPool:
+        # The first thread reuses the model of the engine, which is idle while the
+        # calling thread waits on the pool, so only the other threads load their own
+        spare_backends = [self.backend]
+
+        def create_recognizer() -> OCRBackend:
+            try:
+                return spare_backends.pop()
+            except IndexError:
+                return self.backend_factory()
+
+        return RecognizerPool(create_recognizer, n_threads)
+
+    def warm_up(self) -> None:
+        # Run the models once so that the first screenshot does not pay for it
+        blank = np.zeros((32, 128), dtype=np.uint8)
+        self.backend.recognize([blank])
+        self.backend.detect(blank)
+
     @staticmethod
     def reformat_results(results: dict) -> dict:
         # Copy dictionary
@@ -123,39 +218,7 @@ class ApexOCREngine:
 
         return reformatted_dict
 
-    @staticmethod
-    def is_valid_results(results: dict) -> bool:
-        results_copy = results.copy()
-
-        # Check for empty results dictionary
-        if not results_copy:
-            logger.error("Empty results!")
-            return False
-
-        # Check for "n/a" in squad placement
-        if "n/a" in results_copy.values():
-            logger.error("N/A found in results!")
-            return False
-
-        # Check for valid squad placement range
-        if results["Place"] < 0 or results["Place"] > 20:
-            logger.error("Invalid value for squad placement!")
-            return False
-
-        # Check for any fields with empty strings except for clan tag
-        p1_clan_tag = results_copy.pop("P1 Clan")
-        p2_clan_tag = results_copy.pop("P2 Clan")
-        p3_clan_tag = results_copy.pop("P3 Clan")
-        if "" in results_copy.values():
-            logger.error("Empty string in results!")
-            return False
-
-        # Check for invalid kills / assists / knockdowns
-        if -1 in results_copy.values():
-            logger.error("Inalid Kills/Assists/Knocks in results!")
-            return False
-
-        return True
+    is_valid_results = staticmethod(utils.is_valid_results)
 
     @staticmethod
     def process_player_name(text: str) -> Tuple[str, str]:
@@ -216,7 +279,10 @@ class ApexOCREngine:
         return time_survived_list
 
     def classify_summary_page(
-        self, input: Union[Image.Image, Path, None] = None, debug: bool = False
+        self,
+        input: Union[Image.Image, Path, None] = None,
+        layout: Optional[RoiLayout] = None,
+        debug: bool = False,
     ) -> Union[SummaryType, None]:
         if input is not None:
             if isinstance(input, Image.Image):
@@ -227,23 +293,28 @@ class ApexOCREngine:
                 logger.error(f"Unsupported input type: {type(input)}")
                 return None
         else:
-            image = ImageGrab.grab(bbox=roi.TOP_SCREEN)
+            if layout is None:
+                layout = scale_rois()
+            image = utils.grab_screen(layout.top_screen)
 
-        summary_img = np.array(image.crop(roi.SUMMARY_ROI))
-        total_kills_img = np.array(image.crop(roi.TOTAL_KILLS_ROI))
+        if layout is None:
+            layout = scale_rois(image.size)
 
-        summary_text = self.text_from_image_paddleocr(
+        summary_img = np.array(image.crop(layout.summary))
+        total_kills_img = np.array(image.crop(layout.total_kills))
+
+        summary_text = self.text_from_image(
             summary_img, blur_amount=3, text_detection=True
         )
-        kills_text = self.text_from_image_paddleocr(
+        kills_text = self.text_from_image(
             total_kills_img, blur_amount=3, text_detection=True
         )
 
         if debug:
             draw = ImageDraw.Draw(image)
 
-            draw.rectangle(roi.SUMMARY_ROI, width=3)
-            draw.rectangle(roi.TOTAL_KILLS_ROI, width=3)
+            draw.rectangle(layout.summary, width=3)
+            draw.rectangle(layout.total_kills, width=3)
 
             draw.text((5, 5), f"{summary_text=}\n{kills_text=}", stroke_width=3)
             image.save(
@@ -260,7 +331,10 @@ class ApexOCREngine:
 
         return None
 
-    def get_database_session(self) -> ApexDatabaseApi:
+    def get_database_session(self) -> "ApexDatabaseApi":
+        # Imported on first use so that the engine can run without a database
+        from apex_ocr.database.api import ApexDatabaseApi
+
         with open(DATABASE_YML_FILE) as db_file:
             db_config = yaml.load(db_file, Loader=yaml.FullLoader)
 
@@ -277,38 +351,135 @@ class ApexOCREngine:
 
         return ApexDatabaseApi(db_conn_str)
 
-    def text_from_image_paddleocr(
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        return text.replace("\n", "").replace(" ", "").lower()
+
+    def text_from_image(
         self, image: np.ndarray, blur_amount: int, text_detection: bool = False
     ) -> str:
         img = preprocess_image(image, blur_amount)
-        texts = self.paddle_ocr.ocr(img, det=text_detection, cls=False)[0]
+
+        # Cached as (text, confidence) like the results of texts_from_images
+        cache_key = (array_digest(img), text_detection)
+        cached = self.ocr_cache.get(cache_key)
+        if cached is not None:
+            return cached[0]
+
+        if text_detection:
+            texts = self.backend.detect(img)
+        else:
+            texts = self.backend.recognize([img])
 
         # Concatenate all the recognized strings together
-        text = ""
-        for t in texts:
-            if text_detection:
-                text += t[1][0]
-            else:
-                text += t[0]
-        text = text.replace("\n", "").replace(" ", "").lower()
+        text = self.normalize_text("".join(t for t, _ in texts))
+        confidence = min((c for _, c in texts), default=0.0)
+
+        self.ocr_cache.put(cache_key, (text, confidence))
 
         return text
 
+    def texts_from_images(
+        self, images: List[np.ndarray], backend: Optional[OCRBackend] = None
+    ) -> List[Tuple[str, float]]:
+        if backend is None:
+            backend = self.backend
+
+        if not images:
+            return []
+
+        cache_keys = [(array_digest(img), False) for img in images]
+
+        # Only recognize each distinct image that is not already cached
+        texts = {}
+        uncached = {}
+        for cache_key, img in zip(cache_keys, images):
+            if cache_key in texts or cache_key in uncached:
+                continue
+
+            text = self.ocr_cache.get(cache_key)
+            if text is None:
+                uncached[cache_key] = img
+            else:
+                texts[cache_key] = text
+
+        if uncached:
+            rec_res = backend.recognize(list(uncached.values()))
+
+            for cache_key, (text, confidence) in zip(uncached.keys(), rec_res):
+                texts[cache_key] = (self.normalize_text(text), confidence)
+                self.ocr_cache.put(cache_key, texts[cache_key])
+
+        return [texts[cache_key] for cache_key in cache_keys]
+
+    @staticmethod
+    def is_numeric_region(key: str) -> bool:
+        return key.split(" ")[-1] in NUMERIC_STATS
+
+    @staticmethod
+    def count_votes(
+        keys: List[str], texts: List[Tuple[str, float]]
+    ) -> Tuple[DefaultDict[str, Counter], DefaultDict[Tuple[str, str], float]]:
+        # Votes and best confidence of every recognized text for each region
+        votes = defaultdict(Counter)
+        confidences = defaultdict(float)
+
+        for key, (text, confidence) in zip(keys, texts):
+            votes[key][text] += 1
+            confidences[key, text] = max(confidences[key, text], confidence)
+
+        return votes, confidences
+
+    def tally_texts(
+        self,
+        backend: OCRBackend,
+        keys: List[str],
+        images: List[np.ndarray],
+        blurs: List[int],
+    ) -> Tuple[DefaultDict[str, Counter], DefaultDict[Tuple[str, str], float]]:
+        texts = self.texts_from_images(images, backend)
+
+        # Learn the game font from confidently recognized numeric regions, only from
+        # the unblurred crops that the digit recognizer reads
+        if self.digit_recognizer is not None:
+            for key, img, blur_amount, (text, confidence) in zip(
+                keys, images, blurs, texts
+            ):
+                if blur_amount == 0 and self.is_numeric_region(key):
+                    self.digit_recognizer.calibrate(img, text, confidence)
+
+        return self.count_votes(keys, texts)
+
+    def is_settled(self, votes: Counter, confidence: float) -> bool:
+        # Most common text and the best recognition confidence it was given
+        text, count = votes.most_common(1)[0]
+        total = sum(votes.values())
+
+        # Enough passes agree on the text
+        if count >= self.vote_quorum and count * 2 > total:
+            return True
+
+        # Every pass agrees and the recognizer is confident in the text
+        return count == total and confidence >= self.vote_confidence
+
     def process_squad_summary_page(
-        self, image: Union[Image.Image, Path, None] = None, debug: bool = False
+        self,
+        image: Union[Image.Image, Path, None] = None,
+        layout: Optional[RoiLayout] = None,
+        debug: bool = False,
+        timestamp: Optional[datetime] = None,
     ) -> dict:
         results_dict = defaultdict(None)
 
         if image is not None:
             if isinstance(image, Image.Image):
                 pil_image = image
-                results_dict["Datetime"] = datetime.utcnow()
+                results_dict["Datetime"] = timestamp or datetime.utcnow()
 
             elif isinstance(image, Path):
                 pil_image = Image.open(str(image))
-                # Screenshots do not have EXIF data so must resort to file OS stats
-                results_dict["Datetime"] = datetime.fromtimestamp(
-                    image.stat().st_ctime, tz=timezone.utc
+                results_dict["Datetime"] = timestamp or utils.get_screenshot_datetime(
+                    image
                 )
 
             else:
@@ -317,41 +488,130 @@ class ApexOCREngine:
 
             dup_images = [pil_image] * self.num_images
 
+            if layout is None:
+                layout = scale_rois(pil_image.size)
+
         else:
+            if layout is None:
+                layout = scale_rois()
+
             # Take duplicate images immediately to get the most common interpretation
             dup_images = [
-                ImageGrab.grab(bbox=roi.TOP_SCREEN) for _ in range(self.num_images)
+                utils.grab_screen(layout.top_screen) for _ in range(self.num_images)
             ]
             results_dict["Datetime"] = datetime.utcnow()
 
-        matches = defaultdict(list)
-
         if debug:
             dup_images[0].save(
                 DATA_DIRECTORY
                 / f"dup_image_{datetime.utcnow().strftime('%Y-%m-%d_%H-%M-%S')}.png"
             )
         else:
-            # Magic: Important when running in docker with joblib
+            # Magic: Important when running in docker with threads
             dup_images[0].load()
 
         logger.info("Processing squad summary...")
 
-        if PARALLEL:
-            with parallel_backend(
-                "threading", n_jobs=len(self.blurs)
-            ):  # , require='sharedmem'):
-                # job_args = [[img, blur_amount, matches] for img, blur_amount in zip(dup_images, self.blurs)]
-                # OCR for all the images captured, then assign interpretation to the associated stat
-                Parallel()(
-                    delayed(self.process_squad_summary_page_helper)(
-                        img, blur_amount, matches, debug
-                    )
-                    for img, blur_amount in zip(dup_images, self.blurs)
-                )
+        # Convert each distinct frame to grayscale once and share it between passes
+        boxes = layout.boxes
+        frames = {}
+        for img in dup_images:
+            if id(img) not in frames:
+                frames[id(img)] = self.get_frame_preprocessor(img, layout, debug)
+
+        # Run the cheapest (least blurred) passes first
+        passes = sorted(
+            (
+                (frames[id(img)], blur_amount)
+                for img, blur_amount in zip(dup_images, self.blurs)
+            ),
+            key=lambda p: p[1],
+        )
+
+        if self.adaptive:
+            # One pass at a time so that agreeing regions can stop early
+            rounds = [[p] for p in passes]
         else:
-            for img, blur_amount in zip(dup_images, self.blurs):
-                self.process_squad_summary_page_helper(img, blur_amount, matches, debug)
+            # Recognize every pass in a single batch
+            rounds = [passes]
+
+        votes = defaultdict(Counter)
+        confidences = defaultdict(float)
+        settled = set()
+        n_recognized = 0
+        n_digits = 0
+
+        for round_passes in rounds:
+            # Crop and preprocess the unsettled regions for every pass in the round
+            crop_keys = []
+            crops = []
+            crop_blurs = []
+            digit_keys = []
+            digit_texts = []
+            for frame, blur_amount in round_passes:
+                for key, box in boxes.items():
+                    if key in settled:
+                        continue
+
+                    crop = frame.preprocess(box, blur_amount)
+
+                    # Numeric regions only fall back to the OCR backend on low confidence
+                    if (
+                        blur_amount == 0
+                        and self.digit_recognizer is not None
+                        and self.is_numeric_region(key)
+                    ):
+                        digit_text = self.digit_recognizer.recognize(crop)
+                        if digit_text is not None:
+                            digit_keys.append(key)
+                            digit_texts.append(digit_text)
+                            continue
+
+                    crop_keys.append(key)
+                    crops.append(crop)
+                    crop_blurs.append(blur_amount)
+
+            n_recognized += len(crops)
+            n_digits += len(digit_texts)
+
+            if self.recognizer_pool is not None:
+                # Each thread recognizes and tallies its share with its own recognizer
+                tallies = self.recognizer_pool.map(
+                    self.tally_texts, crop_keys, crops, crop_blurs
+                )
+            else:
+                # Recognize all the crops of the round in a single batch
+                tallies = [self.tally_texts(self.backend, crop_keys, crops, crop_blurs)]
+
+            tallies.append(self.count_votes(digit_keys, digit_texts))
+
+            # Merge the tallies of the round into the page votes
+            for round_votes, round_confidences in tallies:
+                for key, counts in round_votes.items():
+                    votes[key].update(counts)
+                for key, confidence in round_confidences.items():
+                    confidences[key] = max(confidences[key], confidence)
+
+            for key, counts in votes.items():
+                if self.is_settled(
+                    counts, confidences[key, counts.most_common(1)[0][0]]
+                ):
+                    settled.add(key)
+
+            if len(settled) == len(votes):
+                break
+
+        logger.debug(
+            f"Recognized {n_recognized} regions with the OCR backend and {n_digits} with "
+            f"digit templates, {len(settled)}/{len(votes)} settled"
+        )
+
+        # Parse every interpretation of each region into its stats
+        matches = defaultdict(list)
+        for key, counts in votes.items():
+            for text, count in counts.items():
+                for _ in range(count):
+                    self.parse_squad_summary_text(key, text, matches)
 
         # For each image, find the most common OCR text interpretation for each stat
         # If no available interpretations of the stat, assign the value "n/a"
@@ -364,24 +624,30 @@ class ApexOCREngine:
             else:
                 results_dict[k] = "n/a"
 
+        # Get squad kills
+        results_dict["Squad Kills"] = sum(
+            results_dict[f"{player} Kills"] for player in ["P1", "P2", "P3"]
+        )
+
         logger.info("Finished processing images")
+        logger.debug(f"OCR cache: {self.ocr_cache.stats()}")
 
         return results_dict
 
-    def process_squad_summary_page_helper(
+    def get_frame_preprocessor(
         self,
         img: Image.Image,
-        blur_amount: int,
-        matches: DefaultDict,
+        layout: RoiLayout,
         debug: bool = False,
-    ):
+    ) -> FramePreprocessor:
         if img is None:
             logger.error(f"img is None")
             exit(1)
-        # Get regions of interest
-        squad_place, players = get_rois(img, debug)
 
         if debug:
+            # Save the regions of interest drawn on a copy of the image
+            squad_place, _ = get_rois(img.copy(), layout, debug)
+
             img.save(
                 DATA_DIRECTORY
                 / f"img_{datetime.utcnow().strftime('%Y-%m-%d_%H-%M-%S')}.png"
@@ -391,123 +657,207 @@ class ApexOCREngine:
                 / f"squad_place_{datetime.utcnow().strftime('%Y-%m-%d_%H-%M-%S')}.png"
             )
 
-        # Get text from the images
-        place_text = self.text_from_image_paddleocr(squad_place, blur_amount)
+        return FramePreprocessor(img)
 
-        # Get squad placement
-        matches["Place"].extend(
-            utils.replace_nondigits(re.findall("#([0-9]{1,2})", place_text))
-        )
+    def parse_squad_summary_text(self, key: str, text: str, matches: DefaultDict):
+        if key == "squad_place":
+            # Get squad placement
+            matches["Place"].extend(
+                utils.replace_nondigits(re.findall("#([0-9]{1,2})", text))
+            )
+            return
 
-        squad_kills = 0
+        player, stat = key.split(" ")
 
-        # Get individual player stat
-        for player, player_dict in players.items():
+        if stat == "player":
             # Get player username
-            player_name_text = self.text_from_image_paddleocr(
-                player_dict["player"],
-                blur_amount,
-            )
-            clan_tag, player_name = self.process_player_name(player_name_text)
+            clan_tag, player_name = self.process_player_name(text)
             matches[player].append(player_name)
             matches[f"{player} Clan"].append(clan_tag)
 
+        elif stat == "kakn":
             # Get player kills/assists/knockdowns
-            kakn_text = self.text_from_image_paddleocr(player_dict["kakn"], blur_amount)
-            kills, assists, knocks = self.process_kakn(kakn_text)
-            squad_kills += kills
-
+            kills, assists, knocks = self.process_kakn(text)
             matches[f"{player} Kills"].append(kills)
             matches[f"{player} Assists"].append(assists)
             matches[f"{player} Knocks"].append(knocks)
 
+        elif stat == "damage":
             # Get player damage
-            damage_text = self.text_from_image_paddleocr(
-                player_dict["damage"], blur_amount
-            )
             try:
-                damage = int(damage_text)
+                damage = int(text)
             except ValueError:
-                logger.debug(f"Damage misinterpreted: {damage_text}")
+                logger.debug(f"Damage misinterpreted: {text}")
                 damage = -1
             matches[f"{player} Damage"].append(damage)
 
+        elif stat == "survival_time":
             # Get player survival time
             # TODO: Add validation to survival time text
-            time_text = self.text_from_image_paddleocr(
-                player_dict["survival_time"], blur_amount
-            )
-            if len(time_text) >= 3 and ":" not in time_text:
-                time_text = ":".join([time_text[:-2], time_text[-2:]])
-            matches[f"{player} Time Survived"].append(time_text)
+            if len(text) >= 3 and ":" not in text:
+                text = ":".join([text[:-2], text[-2:]])
+            matches[f"{player} Time Survived"].append(text)
 
+        elif stat == "revives":
             # Get player revives
-            revive_text = self.text_from_image_paddleocr(
-                player_dict["revives"], blur_amount
-            )
             try:
-                revives = int(revive_text)
+                revives = int(text)
             except ValueError:
-                logger.debug(f"Revives misinterpreted: {revive_text}")
+                logger.debug(f"Revives misinterpreted: {text}")
                 revives = -1
             matches[f"{player} Revives"].append(revives)
 
+        elif stat == "respawns":
             # Get player respawns
-            respawn_text = self.text_from_image_paddleocr(
-                player_dict["respawns"],
-                blur_amount,
-            )
             try:
-                respawns = int(respawn_text)
+                respawns = int(text)
             except ValueError:
-                logger.debug(f"Respawns misinterpreted: {respawn_text}")
+                logger.debug(f"Respawns misinterpreted: {text}")
                 respawns = -1
             matches[f"{player} Respawns"].append(respawns)
 
-        # Get squad kills
-        matches["Squad Kills"].append(squad_kills)
-
-    def process_screenshot(
-        self, image: Union[Image.Image, Path, None] = None, debug: bool = False
+    def ocr_screenshot(
+        self,
+        image: Union[Image.Image, Path, None] = None,
+        debug: bool = False,
+        timestamp: Optional[datetime] = None,
     ) -> dict:
+        fingerprint = None
+
         if isinstance(image, Image.Image):
-            scale_rois(image.size)
+            layout = scale_rois(image.size)
+            frame = image
         elif isinstance(image, Path):
-            scale_rois(Image.open(image).size)
+            frame = Image.open(image)
+            layout = scale_rois(frame.size)
+
+            # Decode the screenshot once for classification and OCR
+            if timestamp is None:
+                timestamp = utils.get_screenshot_datetime(image)
+            image = frame
         else:
-            scale_rois()
+            layout = scale_rois()
+            frame = utils.grab_screen(layout.top_screen)
+
+            # Reject frames that cannot be a summary page before running any OCR
+            if self.summary_gate is not None and not self.summary_gate.is_candidate(
+                frame, layout
+            ):
+                return {}
+
+            # Reuse the results of a near-identical frame that was recently processed
+            fingerprint = frame_fingerprint(frame, layout)
+            results_dict = self.frame_memo.get(fingerprint)
+            if results_dict is not None:
+                logger.debug("Frame unchanged, skipping OCR")
+                return results_dict
 
-        summary_type = self.classify_summary_page(image, debug=debug)
+        summary_type = self.classify_summary_page(frame, layout, debug)
         results_dict = {}
 
+        if summary_type is not None and self.summary_gate is not None:
+            self.summary_gate.learn(frame, layout)
+
         if summary_type == SummaryType.PERSONAL:
             pass
 
         elif summary_type == SummaryType.SQUAD:
-            results_dict = self.process_squad_summary_page(image, debug)
+            results_dict = self.process_squad_summary_page(
+                image, layout, debug, timestamp
+            )
 
         if results_dict:
             # Compute hash of results
             d = self.reformat_results(results_dict)
             results_dict["Hash"] = utils.hash_dict(d)
 
-            # Print results to console
-            utils.display_results(results_dict)
+        # Only valid results are reused, a missed or misread frame is read again
+        if (
+            fingerprint is not None
+            and results_dict
+            and utils.is_valid_results(results_dict)
+        ):
+            self.frame_memo.put(fingerprint, results_dict)
+            logger.info(
+                f"Frame fingerprint {fingerprint:x} has results hash "
+                f"{results_dict['Hash']}"
+            )
 
-            if self.is_valid_results(results_dict):
-                # Currently only supporting squad stats
-                # Will need to change this if there is another output filepath or format
-                if utils.write_to_file(
-                    SQUAD_STATS_FILE, self.squad_summary_headers, results_dict
-                ):
-                    logger.info(f"Finished writing results to {SQUAD_STATS_FILE.name}")
+        return results_dict
+
+    def save_results(
+        self, results_dict: dict, image: Union[Image.Image, Path, None] = None
+    ) -> bool:
+        if not results_dict:
+            return False
+
+        if results_dict["Hash"] == self.last_results_hash:
+            logger.debug(f"Results {results_dict['Hash']} were already handled")
+            return False
+
+        self.last_results_hash = results_dict["Hash"]
 
-                if DATABASE and self.db_conn is not None:
-                    self.db_conn.push_results(results_dict)
+        # Print results to console
+        utils.display_results(results_dict)
+
+        if not self.is_valid_results(results_dict):
+            if isinstance(image, Path):
+                logger.error(f"Invalid results for {image}: {results_dict}")
             else:
-                if isinstance(image, Path):
-                    logger.error(f"Invalid results for {image}: {results_dict}")
-                else:
-                    logger.error(f"Invalid results for screenshot: {results_dict}")
+                logger.error(f"Invalid results for screenshot: {results_dict}")
+            return False
+
+        try:
+            # Currently only supporting squad stats
+            # Will need to change this if there is another output filepath or format
+            if self.result_writer.write(results_dict):
+                logger.info(f"Finished writing results to {SQUAD_STATS_FILE.name}")
+            else:
+                logger.info(f"Results {results_dict['Hash']} already written")
+
+            if PARQUET_OUTPUT:
+                get_parquet_writer(PARQUET_DIRECTORY, self.squad_summary_headers).write(
+                    results_dict
+                )
+
+            if self.db_conn is not None:
+                self.db_conn.push_results(results_dict)
+        except Exception:
+            # Failed writes are retried the next time the same results are saved
+            self.last_results_hash = None
+            raise
+
+        return True
+
+    @property
+    def result_writer(self) -> CsvResultWriter:
+        # Created on first use, worker processes never save results
+        return get_result_writer(SQUAD_STATS_FILE, self.squad_summary_headers)
+
+    @property
+    def result_writers(self) -> List[Union[CsvResultWriter, ParquetResultWriter]]:
+        result_writers = [self.result_writer]
+        if PARQUET_OUTPUT:
+            result_writers.append(
+                get_parquet_writer(PARQUET_DIRECTORY, self.squad_summary_headers)
+            )
+        return result_writers
+
+    def results_written(self, results_hash: str) -> bool:
+        # Saved results can still be buffered by the result writers
+        return all(
+            result_writer.is_written(results_hash)
+            for result_writer in self.result_writers
+        )
+
+    def flush_results(self) -> None:
+        for result_writer in self.result_writers:
+            result_writer.flush()
+
+    def process_screenshot(
+        self, image: Union[Image.Image, Path, None] = None, debug: bool = False
+    ) -> dict:
+        results_dict = self.ocr_screenshot(image, debug)
+        self.save_results(results_dict, image)
 
         return results_dict
@@ -0,0 +1,110 @@
+import time
+from collections import deque
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from apex_ocr.config import FINGERPRINT_MAX_DISTANCE, FRAME_MEMO_TTL
+from apex_ocr.roi import RoiLayout
+
+# Number of bits in the difference hash of one region
+HASH_SIZE = 8
+HASH_BITS = HASH_SIZE * HASH_SIZE
+
+# Width and height of the grayscale thumbnail of one region
+THUMBNAIL_SIZE = (16, 8)
+
+
+def dhash(image: Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """Compute the difference hash of an image.
+
+    Args:
+        image (Image.Image): Input image.
+        hash_size (int, optional): Width and height of the hash. Defaults to 8.
+
+    Returns:
+        int: Hash with one bit per horizontal gradient of the downsampled image.
+    """
+    pixels = np.asarray(
+        image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR),
+        dtype=np.int16,
+    )
+    bits = pixels[:, 1:] > pixels[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def frame_fingerprint(image: Image.Image, layout: RoiLayout) -> int:
+    # Concatenate the difference hash of every stat region
+    fingerprint = 0
+    for box in layout.boxes.values():
+        fingerprint = (fingerprint << HASH_BITS) | dhash(image.crop(box))
+
+    return fingerprint
+
+
+def region_thumbnails(image: Image.Image, layout: RoiLayout) -> np.ndarray:
+    """Downsample every stat region to a small grayscale thumbnail.
+
+    A difference hash only keeps the sign of each gradient, so a stat that differs by
+    a single digit moves it by fewer bits than re-encoding the screenshot does. The
+    thumbnails keep the brightness of every cell, which a changed character moves by
+    far more than compression noise.
+
+    Args:
+        image (Image.Image): Input image.
+        layout (RoiLayout): Layout of the regions of interest.
+
+    Returns:
+        np.ndarray: Thumbnails of shape (regions, height, width).
+    """
+    return np.stack(
+        [
+            np.asarray(image.crop(box).convert("L").resize(THUMBNAIL_SIZE, Image.BOX))
+            for box in layout.boxes.values()
+        ]
+    )
+
+
+def max_pixel_difference(a: np.ndarray, b: np.ndarray) -> int:
+    return int(np.abs(a.astype(np.int16) - b.astype(np.int16)).max())
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class FrameMemo:
+    """Short-lived memo of results keyed by frame fingerprint.
+
+    A lookup matches any remembered fingerprint within ``max_distance`` bits, and
+    refreshes it so that a screen that stays up keeps matching.
+    """
+
+    def __init__(
+        self,
+        ttl: float = FRAME_MEMO_TTL,
+        max_distance: int = FINGERPRINT_MAX_DISTANCE,
+        maxlen: int = 8,
+    ) -> None:
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.entries = deque(maxlen=maxlen)
+
+    def get(self, fingerprint: int) -> Optional[dict]:
+        now = time.monotonic()
+
+        # Forget frames that have not been seen recently
+        while self.entries and now - self.entries[0][0] > self.ttl:
+            self.entries.popleft()
+
+        for i, (_, memo_fingerprint, results) in enumerate(self.entries):
+            if hamming_distance(fingerprint, memo_fingerprint) <= self.max_distance:
+                del self.entries[i]
+                self.entries.append((now, memo_fingerprint, results))
+                return results
+
+        return None
+
+    def put(self, fingerprint: int, results: dict) -> None:
+        self.entries.append((time.monotonic(), fingerprint, results))
@@ -0,0 +1,119 @@
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from PIL import Image
+
+from apex_ocr import utils
+from apex_ocr.config import (
+    SUMMARY_GATE_AUDIT_INTERVAL,
+    SUMMARY_GATE_THRESHOLD,
+    SUMMARY_TEMPLATES_FILE,
+)
+from apex_ocr.preprocessing import match_template
+from apex_ocr.roi import RoiLayout
+
+logger = logging.getLogger(__name__)
+
+# Size of the downsampled summary and total kills regions
+SUMMARY_SIGNATURE_SIZE = (96, 16)
+TOTAL_KILLS_SIGNATURE_SIZE = (48, 16)
+
+# Fraction of strong horizontal edges required for a region to contain text
+MIN_EDGE_FRACTION = 0.02
+EDGE_STRENGTH = 32
+
+MAX_TEMPLATES = 16
+
+
+class SummaryGate:
+    """Cheap pre-classifier that rejects frames which cannot be a summary page.
+
+    A frame is summarized by a small grayscale signature of the summary and total
+    kills regions. Frames whose regions have no text-like edges are rejected. Once
+    signatures of real summary pages have been learned, frames that do not
+    correlate with any of them are rejected as well. Every Nth rejected frame is
+    still let through so that new variants of the summary page can be learned.
+    """
+
+    def __init__(
+        self,
+        templates_file: Optional[Path] = SUMMARY_TEMPLATES_FILE,
+        threshold: float = SUMMARY_GATE_THRESHOLD,
+        audit_interval: int = SUMMARY_GATE_AUDIT_INTERVAL,
+    ) -> None:
+        self.templates_file = templates_file
+        self.threshold = threshold
+        self.audit_interval = audit_interval
+
+        self.templates: List[np.ndarray] = []
+        self.n_rejected = 0
+
+        if templates_file is not None and templates_file.is_file():
+            try:
+                self.templates = list(np.load(templates_file))
+            except (OSError, ValueError, EOFError) as e:
+                # Learned again from the next summary pages
+                logger.warning(f"Failed to load summary page templates: {e}")
+            else:
+                logger.debug(f"Loaded {len(self.templates)} summary page templates")
+
+    @staticmethod
+    def signature(image: Image.Image, layout: RoiLayout) -> np.ndarray:
+        summary = (
+            image.crop(layout.summary)
+            .convert("L")
+            .resize(SUMMARY_SIGNATURE_SIZE, Image.BILINEAR)
+        )
+        total_kills = (
+            image.crop(layout.total_kills)
+            .convert("L")
+            .resize(TOTAL_KILLS_SIGNATURE_SIZE, Image.BILINEAR)
+        )
+
+        return np.concatenate(
+            [np.asarray(summary), np.asarray(total_kills)], axis=1
+        ).astype(np.float32)
+
+    @staticmethod
+    def has_text(signature: np.ndarray) -> bool:
+        edges = np.abs(np.diff(signature, axis=1)) > EDGE_STRENGTH
+        return edges.mean() >= MIN_EDGE_FRACTION
+
+    def score(self, signature: np.ndarray) -> float:
+        # Best normalized correlation with a learned summary page
+        scores = [
+            match_template(signature, template)[0, 0] for template in self.templates
+        ]
+        return float(np.nan_to_num(max(scores, default=0.0)))
+
+    def is_candidate(self, image: Image.Image, layout: RoiLayout) -> bool:
+        signature = self.signature(image, layout)
+
+        if self.has_text(signature) and (
+            not self.templates or self.score(signature) >= self.threshold
+        ):
+            return True
+
+        self.n_rejected += 1
+
+        # Periodically let a rejected frame through in case it is a new variant
+        if self.audit_interval > 0 and self.n_rejected % self.audit_interval == 0:
+            return True
+
+        return False
+
+    def learn(self, image: Image.Image, layout: RoiLayout) -> None:
+        signature = self.signature(image, layout)
+
+        # Skip signatures that are already well represented
+        if self.score(signature) >= 0.95 or len(self.templates) >= MAX_TEMPLATES:
+            return
+
+        self.templates.append(signature)
+        logger.debug(f"Learned summary page template {len(self.templates)}")
+
+        if self.templates_file is not None:
+            templates = np.stack(self.templates)
+            utils.replace_file(self.templates_file, lambda f: np.save(f, templates))
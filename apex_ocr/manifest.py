@@ -0,0 +1,145 @@
+import enum
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from apex_ocr.config import MANIFEST_FILE
+
+logger = logging.getLogger(__name__)
+
+
+class ScreenshotStatus(str, enum.Enum):
+    SAVED = "saved"
+    # Results were invalid or had already been saved
+    NOT_SAVED = "not_saved"
+    NO_RESULTS = "no_results"
+    DUPLICATE = "duplicate"
+    FAILED = "failed"
+
+
+# Screenshots with any other status are processed again by the next run
+DONE_STATUSES = {
+    ScreenshotStatus.SAVED,
+    ScreenshotStatus.NOT_SAVED,
+    ScreenshotStatus.NO_RESULTS,
+    ScreenshotStatus.DUPLICATE,
+}
+
+
+def file_digest(path: Path) -> str:
+    m = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            m.update(chunk)
+    return m.hexdigest()
+
+
+class ScreenshotManifest:
+    """Persistent record of the outcome of every processed screenshot.
+
+    Screenshots are keyed by the hash of their content, so renamed or moved copies
+    are recognized. The hash is only computed again when the size or modification
+    time of the file no longer match those recorded for its path, and hashes of
+    files that are not recorded yet are kept until they are.
+    """
+
+    def __init__(self, manifest_file: Path = MANIFEST_FILE) -> None:
+        self.manifest_file = manifest_file
+        self.lock = threading.Lock()
+
+        # Content hash of unrecorded files keyed by path, size and modification time
+        self.pending_hashes = {}
+
+        # Used by the main thread and the persist stage of the pipeline
+        self.conn = sqlite3.connect(str(manifest_file), check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS screenshots ("
+            "content_hash TEXT PRIMARY KEY, "
+            "path TEXT NOT NULL, "
+            "size INTEGER NOT NULL, "
+            "mtime REAL NOT NULL, "
+            "status TEXT NOT NULL, "
+            "results TEXT, "
+            "processed_at TEXT NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS screenshots_path ON screenshots (path)"
+        )
+        self.conn.commit()
+
+    def content_hash(self, screenshot_path: Path) -> str:
+        stat = screenshot_path.stat()
+        key = (str(screenshot_path.resolve()), stat.st_size, stat.st_mtime)
+
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT content_hash FROM screenshots "
+                "WHERE path = ? AND size = ? AND mtime = ?",
+                key,
+            ).fetchone()
+            content_hash = row[0] if row is not None else self.pending_hashes.get(key)
+
+        if content_hash is None:
+            content_hash = file_digest(screenshot_path)
+            with self.lock:
+                self.pending_hashes[key] = content_hash
+
+        return content_hash
+
+    def get_status(self, screenshot_path: Path) -> Optional[ScreenshotStatus]:
+        content_hash = self.content_hash(screenshot_path)
+
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT status FROM screenshots WHERE content_hash = ?",
+                (content_hash,),
+            ).fetchone()
+
+        return ScreenshotStatus(row[0]) if row is not None else None
+
+    def unprocessed(self, file_list: List[Path]) -> List[Path]:
+        return [
+            screenshot_path
+            for screenshot_path in file_list
+            if self.get_status(screenshot_path) not in DONE_STATUSES
+        ]
+
+    def record(
+        self, screenshot_path: Path, status: ScreenshotStatus, results_dict: dict
+    ) -> None:
+        stat = screenshot_path.stat()
+        content_hash = self.content_hash(screenshot_path)
+
+        # Exact copies share a record, which keeps the outcome of the original
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO screenshots VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (content_hash) DO UPDATE SET "
+                "path = excluded.path, size = excluded.size, mtime = excluded.mtime, "
+                "status = excluded.status, results = excluded.results, "
+                "processed_at = excluded.processed_at "
+                "WHERE excluded.status != ?",
+                (
+                    content_hash,
+                    str(screenshot_path.resolve()),
+                    stat.st_size,
+                    stat.st_mtime,
+                    status.value,
+                    json.dumps(results_dict, default=str) if results_dict else None,
+                    datetime.utcnow().isoformat(),
+                    ScreenshotStatus.DUPLICATE.value,
+                ),
+            )
+            self.conn.commit()
+
+            self.pending_hashes.pop(
+                (str(screenshot_path.resolve()), stat.st_size, stat.st_mtime), None
+            )
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,62 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class RecognizerPool:
+    """Long-lived thread pool where every thread owns its own recognizer.
+
+    Recognizers are created lazily by ``recognizer_factory`` the first time a thread
+    runs a task, then reused for the lifetime of the pool. Tasks never share a
+    recognizer, so no locking is required around inference.
+    """
+
+    def __init__(self, recognizer_factory: Callable[[], Any], n_threads: int) -> None:
+        self.n_threads = n_threads
+
+        self._recognizer_factory = recognizer_factory
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(
+            max_workers=n_threads, thread_name_prefix="apex_ocr_recognizer"
+        )
+
+    def get_recognizer(self) -> Any:
+        recognizer = getattr(self._local, "recognizer", None)
+
+        if recognizer is None:
+            logger.debug(f"Loading recognizer for {threading.current_thread().name}")
+            recognizer = self._recognizer_factory()
+            self._local.recognizer = recognizer
+
+        return recognizer
+
+    def map(self, fn: Callable[..., Any], *sequences: Sequence) -> List[Any]:
+        """Split sequences into one chunk per thread and run ``fn`` on each chunk.
+
+        Args:
+            fn (Callable[..., Any]): Called as ``fn(recognizer, *chunks)``.
+            *sequences (Sequence): Sequences of equal length to split into chunks.
+
+        Returns:
+            List[Any]: Return value of ``fn`` for every non-empty chunk.
+        """
+        n_items = len(sequences[0])
+        n_chunks = min(self.n_threads, n_items)
+
+        futures = [
+            self._executor.submit(
+                self._run, fn, *[sequence[i::n_chunks] for sequence in sequences]
+            )
+            for i in range(n_chunks)
+        ]
+
+        return [future.result() for future in futures]
+
+    def _run(self, fn: Callable[..., Any], *chunks: Sequence) -> Any:
+        return fn(self.get_recognizer(), *chunks)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
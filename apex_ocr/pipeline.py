@@ -0,0 +1,361 @@
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Deque, Iterable, List, Optional, Tuple
+
+from PIL import Image
+
+from apex_ocr import utils
+from apex_ocr.batch import create_worker_pool, ocr_worker
+from apex_ocr.config import PIPELINE_QUEUE_SIZE, WATCH_INTERVAL
+from apex_ocr.dedupe import (
+    DuplicateIndex,
+    ScreenshotFingerprint,
+    screenshot_fingerprint,
+)
+from apex_ocr.engine import ApexOCREngine
+from apex_ocr.manifest import ScreenshotManifest, ScreenshotStatus
+
+logger = logging.getLogger(__name__)
+
+# Called with the screenshot path, or None in watch mode, and its results
+ResultCallback = Callable[[Optional[Path], dict], None]
+
+
+class ScreenshotPipeline:
+    """Staged screenshot pipeline: load -> OCR -> persist.
+
+    Stages run concurrently and hand screenshots over through bounded queues, so
+    decoding the next screenshot and saving the previous results overlap with OCR.
+    A stage that falls behind fills its input queue, which blocks the stage before
+    it. Results are always persisted in input order.
+
+    With a single worker, OCR runs on a thread of this process with the given
+    engine. With more workers, screenshots are decoded and processed by a pool of
+    worker processes and only persistence uses the given engine.
+
+    Screenshots that are near-duplicates of one in the duplicate index are skipped
+    before OCR, and those that produce results are added to it. The outcome of every
+    screenshot is recorded in the manifest once it is persisted.
+    """
+
+    def __init__(
+        self,
+        engine: ApexOCREngine,
+        workers: int = 1,
+        queue_size: int = PIPELINE_QUEUE_SIZE,
+        debug: bool = False,
+        duplicate_index: Optional[DuplicateIndex] = None,
+        manifest: Optional[ScreenshotManifest] = None,
+    ) -> None:
+        self.engine = engine
+        self.workers = workers
+        self.queue_size = queue_size
+        self.debug = debug
+        self.duplicate_index = duplicate_index
+        self.manifest = manifest
+
+    async def process_files(
+        self, file_list: Iterable[Path], callback: Optional[ResultCallback] = None
+    ) -> None:
+        load_queue = asyncio.Queue(maxsize=self.queue_size)
+        # Enough screenshots in flight to keep every worker busy
+        persist_queue = asyncio.Queue(maxsize=max(self.queue_size, 2 * self.workers))
+
+        if self.workers > 1:
+            ocr_executor = create_worker_pool(self.workers)
+        else:
+            ocr_executor = ThreadPoolExecutor(1, thread_name_prefix="apex_ocr_ocr")
+
+        with ThreadPoolExecutor(
+            1, thread_name_prefix="apex_ocr_load"
+        ) as load_executor, ocr_executor, ThreadPoolExecutor(
+            1, thread_name_prefix="apex_ocr_persist"
+        ) as persist_executor:
+            await asyncio.gather(
+                self.load_stage(file_list, load_queue, load_executor),
+                self.ocr_stage(load_queue, persist_queue, ocr_executor),
+                self.persist_stage(persist_queue, persist_executor, callback),
+            )
+
+    async def watch(
+        self,
+        interval: float = WATCH_INTERVAL,
+        callback: Optional[ResultCallback] = None,
+    ) -> None:
+        persist_queue = asyncio.Queue(maxsize=self.queue_size)
+
+        with ThreadPoolExecutor(
+            1, thread_name_prefix="apex_ocr_ocr"
+        ) as ocr_executor, ThreadPoolExecutor(
+            1, thread_name_prefix="apex_ocr_persist"
+        ) as persist_executor:
+            await asyncio.gather(
+                self.capture_stage(persist_queue, ocr_executor, interval),
+                self.persist_stage(persist_queue, persist_executor, callback),
+            )
+
+    @staticmethod
+    def load_screenshot(screenshot_path: Path) -> Tuple[Image.Image, datetime]:
+        image = Image.open(screenshot_path)
+        image.load()
+
+        return image, utils.get_screenshot_datetime(screenshot_path)
+
+    @staticmethod
+    def fingerprint_screenshot(
+        screenshot_path: Path, image: Optional[Image.Image]
+    ) -> ScreenshotFingerprint:
+        # Worker processes decode their own screenshots, decode it here as well
+        if image is None:
+            with Image.open(screenshot_path) as image:
+                return screenshot_fingerprint(image)
+
+        return screenshot_fingerprint(image)
+
+    async def find_duplicate(
+        self,
+        screenshot_path: Path,
+        fingerprint: ScreenshotFingerprint,
+        in_flight: Deque,
+    ) -> Optional[str]:
+        duplicate = self.duplicate_index.find(fingerprint, screenshot_path)
+        if duplicate is not None:
+            return duplicate
+
+        # Copies are often next to each other and still being processed
+        for other_fingerprint, other_path, future in in_flight:
+            if other_path == screenshot_path or not self.duplicate_index.is_duplicate(
+                fingerprint, other_fingerprint
+            ):
+                continue
+
+            try:
+                results_dict = await future
+            except Exception:
+                continue
+
+            if results_dict and utils.is_valid_results(results_dict):
+                return str(other_path)
+
+        return None
+
+    async def load_stage(
+        self,
+        file_list: Iterable[Path],
+        load_queue: asyncio.Queue,
+        executor: Executor,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+
+        for screenshot_path in file_list:
+            image, timestamp, fingerprint = None, None, None
+
+            try:
+                # Worker processes decode their own screenshots
+                if self.workers == 1:
+                    image, timestamp = await loop.run_in_executor(
+                        executor, self.load_screenshot, screenshot_path
+                    )
+
+                if self.duplicate_index is not None:
+                    fingerprint = await loop.run_in_executor(
+                        executor, self.fingerprint_screenshot, screenshot_path, image
+                    )
+            except Exception as e:
+                logger.error(f"Failed to load {screenshot_path}: {e}")
+                await load_queue.put(
+                    (screenshot_path, None, None, None, ScreenshotStatus.FAILED)
+                )
+                continue
+
+            await load_queue.put((screenshot_path, image, timestamp, fingerprint, None))
+
+        await load_queue.put(None)
+
+    async def ocr_stage(
+        self,
+        load_queue: asyncio.Queue,
+        persist_queue: asyncio.Queue,
+        executor: Executor,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+
+        # Screenshots that may not be persisted and in the duplicate index yet
+        in_flight = deque(maxlen=2 * persist_queue.maxsize + 1)
+
+        while True:
+            item = await load_queue.get()
+            if item is None:
+                break
+
+            screenshot_path, image, timestamp, fingerprint, status = item
+
+            if status is None and fingerprint is not None:
+                duplicate = await self.find_duplicate(
+                    screenshot_path, fingerprint, in_flight
+                )
+                if duplicate is not None:
+                    logger.info(
+                        f"Skipping {screenshot_path.name}, near-duplicate of {duplicate}"
+                    )
+                    status = ScreenshotStatus.DUPLICATE
+
+            if status is not None:
+                future = loop.create_future()
+                future.set_result({})
+                fingerprint = None
+            elif self.workers > 1:
+                future = loop.run_in_executor(
+                    executor, ocr_worker, screenshot_path, self.debug
+                )
+            else:
+                logger.info(f"Performing OCR on {screenshot_path.name}...")
+                future = loop.run_in_executor(
+                    executor,
+                    self.engine.ocr_screenshot,
+                    image,
+                    self.debug,
+                    timestamp,
+                )
+
+            if fingerprint is not None:
+                in_flight.append((fingerprint, screenshot_path, future))
+
+            # Blocks while the persist stage is behind
+            await persist_queue.put((screenshot_path, future, fingerprint, status))
+
+        await persist_queue.put(None)
+
+    async def capture_stage(
+        self, persist_queue: asyncio.Queue, executor: Executor, interval: float
+    ) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            # The engine grabs the screen itself to gate and fingerprint the frame
+            future = loop.run_in_executor(
+                executor, self.engine.ocr_screenshot, None, self.debug
+            )
+            await persist_queue.put((None, future, None, None))
+
+            await asyncio.wait([future])
+            await asyncio.sleep(interval)
+
+    async def persist_stage(
+        self,
+        persist_queue: asyncio.Queue,
+        executor: Executor,
+        callback: Optional[ResultCallback] = None,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        # Saved screenshots whose results are still buffered
+        saved_screenshots: List[Tuple[Path, dict]] = []
+
+        while True:
+            item = await persist_queue.get()
+            if item is None:
+                break
+
+            screenshot_path, future, fingerprint, status = item
+
+            try:
+                results_dict = await future
+            except Exception as e:
+                if screenshot_path is None:
+                    logger.exception(f"OCR failed for screenshot: {e}")
+                else:
+                    logger.error(f"OCR failed for {screenshot_path}: {e}")
+                results_dict = {}
+                status = ScreenshotStatus.FAILED
+
+            if status is None and not results_dict:
+                status = ScreenshotStatus.NO_RESULTS
+
+            if results_dict:
+                saved = False
+                try:
+                    saved = await loop.run_in_executor(
+                        executor,
+                        self.engine.save_results,
+                        results_dict,
+                        screenshot_path,
+                    )
+                except Exception as e:
+                    logger.exception(f"Failed to save results: {e}")
+                    # Saved again by the next run
+                    status = ScreenshotStatus.FAILED
+
+                if saved:
+                    status = ScreenshotStatus.SAVED
+                elif status is None:
+                    status = ScreenshotStatus.NOT_SAVED
+
+                # Only valid results make later copies of the screenshot duplicates
+                if saved and fingerprint is not None:
+                    await loop.run_in_executor(
+                        executor,
+                        self.duplicate_index.add,
+                        fingerprint,
+                        screenshot_path,
+                        results_dict["Hash"],
+                    )
+
+            if self.manifest is not None and screenshot_path is not None:
+                if status == ScreenshotStatus.SAVED:
+                    # Recorded once the results are written rather than buffered
+                    saved_screenshots.append((screenshot_path, results_dict))
+                else:
+                    await self.record_screenshot(
+                        executor, screenshot_path, status, results_dict
+                    )
+
+                written = [
+                    (path, results)
+                    for path, results in saved_screenshots
+                    if self.engine.results_written(results["Hash"])
+                ]
+                for path, results in written:
+                    saved_screenshots.remove((path, results))
+                    await self.record_screenshot(
+                        executor, path, ScreenshotStatus.SAVED, results
+                    )
+
+            if callback is not None:
+                callback(screenshot_path, results_dict)
+
+        if saved_screenshots:
+            try:
+                await loop.run_in_executor(executor, self.engine.flush_results)
+            except Exception as e:
+                # Processed again by the next run
+                logger.error(f"Failed to write results: {e}")
+                return
+
+            for screenshot_path, results_dict in saved_screenshots:
+                await self.record_screenshot(
+                    executor, screenshot_path, ScreenshotStatus.SAVED, results_dict
+                )
+
+    async def record_screenshot(
+        self,
+        executor: Executor,
+        screenshot_path: Path,
+        status: ScreenshotStatus,
+        results_dict: dict,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+
+        try:
+            await loop.run_in_executor(
+                executor,
+                self.manifest.record,
+                screenshot_path,
+                status,
+                results_dict,
+            )
+        except Exception as e:
+            logger.error(f"Failed to record {screenshot_path}: {e}")
@@ -1,5 +1,8 @@
+from typing import Dict, Tuple, Union
+
 import cv2
 import numpy as np
+from PIL import Image
 
 
 def grayscale(image):
@@ -7,6 +10,13 @@ def grayscale(image):
     return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
 
+def grayscale_to_bgr(image):
+    # get 3 channel image from grayscale image
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    return image
+
+
 def remove_noise(image):
     # noise removal
     return cv2.medianBlur(image, 1)
@@ -75,3 +85,68 @@ def preprocess_image(image: np.ndarray, blur_amount: int = 0) -> np.ndarray:
         return cv2.GaussianBlur(threshold_img, (blur_amount, blur_amount), 0)
     else:
         return threshold_img
+
+
+class FramePreprocessor:
+    """Preprocess the regions of interest of a single frame.
+
+    Only the regions are copied out of the frame and converted to grayscale, as views
+    of array frames or as crops of PIL images, whose array conversion would copy the
+    whole frame. Each region is thresholded once and every blur variant of the
+    region is derived from that thresholded crop.
+    """
+
+    def __init__(
+        self,
+        frame: Union[np.ndarray, Image.Image],
+        origin: Tuple[int, int] = (0, 0),
+    ) -> None:
+        self.frame = frame
+        # Position of the top left corner of the frame in screen coordinates
+        self.origin = origin
+
+        self._thresholded: Dict[Tuple[int, ...], np.ndarray] = {}
+        self._preprocessed: Dict[Tuple[Tuple[int, ...], int], np.ndarray] = {}
+
+    def roi(self, box: Tuple[int, int, int, int]) -> np.ndarray:
+        x0, y0 = self.origin
+        box = (box[0] - x0, box[1] - y0, box[2] - x0, box[3] - y0)
+
+        if isinstance(self.frame, Image.Image):
+            return np.asarray(self.frame.crop(box))
+
+        # View of the frame, no pixels are copied
+        return self.frame[box[1] : box[3], box[0] : box[2]]
+
+    def gray(self, box: Tuple[int, int, int, int]) -> np.ndarray:
+        region = self.roi(box)
+
+        if region.ndim == 2:
+            return region
+        elif region.shape[2] == 4:
+            return cv2.cvtColor(region, cv2.COLOR_BGRA2GRAY)
+        else:
+            return grayscale(region)
+
+    def preprocess(
+        self, box: Tuple[int, int, int, int], blur_amount: int = 0
+    ) -> np.ndarray:
+        preprocessed = self._preprocessed.get((box, blur_amount))
+        if preprocessed is not None:
+            return preprocessed
+
+        threshold_img = self._thresholded.get(box)
+        if threshold_img is None:
+            threshold_img = thresholding(self.gray(box))
+            self._thresholded[box] = threshold_img
+
+        if blur_amount > 0:
+            preprocessed = cv2.GaussianBlur(
+                threshold_img, (blur_amount, blur_amount), 0
+            )
+        else:
+            preprocessed = threshold_img
+
+        self._preprocessed[box, blur_amount] = preprocessed
+
+        return preprocessed
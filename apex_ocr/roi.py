@@ -1,6 +1,9 @@
 import logging
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Tuple, Union
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Mapping, Tuple, Union
 
 import numpy as np
 from PIL import ImageDraw
@@ -11,78 +14,96 @@ from apex_ocr.utils import get_primary_monitor
 
 logger = logging.getLogger(__name__)
 
+Box = Tuple[int, int, int, int]
+
 # Resolution: 1920 x 1080
 # Regions of interest
 
-PRIMARY_MONITOR = get_primary_monitor()
-
-SUMMARY_ROI = ()
-
-TOTAL_KILLS_ROI = ()
-
-TOP_SCREEN = ()
-
-ROI_DICT = {}
-SQUAD_PLACE_ROI = ()
-
-ROI_VARS = {
-    "TOP_ROW_START": 120,
-    "PLAYER_ROW_START": 290,
-    "KAKN_ROW_START": 402,
-    "DAMAGE_ROW_START": 480,
-    "SURV_TIME_ROW_START": 556,
-    "REV_ROW_START": 632,
-    "RES_ROW_START": 708,
-    "TOP_ROW_HEIGHT": 62,
-    "PLAYER_ROW_HEIGHT": 32,
-    "SQUAD_PLACE_COL_START": 1345,
-    "TOTAL_KILL_COL_START": 1600,
-    "P1_COL_START": 125,
-    "P2_COL_START": 725,
-    "P3_COL_START": 1325,
-    "SQUAD_PLACE_WIDTH": 255,
-    "TOTAL_KILL_WIDTH": 220,
-    "PLAYER_WIDTH": 215,
-    "KAKN_WIDTH": 150,
-    "DAMAGE_WIDTH": 130,
-    "SURV_TIME_WIDTH": 130,
-    "REV_RES_WIDTH": 60,
+# Reference values, layouts for other resolutions are scaled from these
+ROI_VARS = MappingProxyType(
+    {
+        "TOP_ROW_START": 120,
+        "PLAYER_ROW_START": 290,
+        "KAKN_ROW_START": 402,
+        "DAMAGE_ROW_START": 480,
+        "SURV_TIME_ROW_START": 556,
+        "REV_ROW_START": 632,
+        "RES_ROW_START": 708,
+        "TOP_ROW_HEIGHT": 62,
+        "PLAYER_ROW_HEIGHT": 32,
+        "SQUAD_PLACE_COL_START": 1345,
+        "TOTAL_KILL_COL_START": 1600,
+        "P1_COL_START": 125,
+        "P2_COL_START": 725,
+        "P3_COL_START": 1325,
+        "SQUAD_PLACE_WIDTH": 255,
+        "TOTAL_KILL_WIDTH": 220,
+        "PLAYER_WIDTH": 215,
+        "KAKN_WIDTH": 150,
+        "DAMAGE_WIDTH": 130,
+        "SURV_TIME_WIDTH": 130,
+        "REV_RES_WIDTH": 60,
+    }
+)
+
+# Row start and width variables of each player stat
+PLAYER_STAT_VARS = {
+    "player": ("PLAYER_ROW_START", "PLAYER_WIDTH"),
+    "kakn": ("KAKN_ROW_START", "KAKN_WIDTH"),
+    "damage": ("DAMAGE_ROW_START", "DAMAGE_WIDTH"),
+    "survival_time": ("SURV_TIME_ROW_START", "SURV_TIME_WIDTH"),
+    "revives": ("REV_ROW_START", "REV_RES_WIDTH"),
+    "respawns": ("RES_ROW_START", "REV_RES_WIDTH"),
 }
 
 
-def scale_rois(resolution: Union[Tuple[int, int], None] = None):
-    # resolution means we are analyzing screenshot(s)
-    if resolution:
-        width, height = resolution
-        x, y = 0, 0
-    else:
-        width, height = PRIMARY_MONITOR.width, PRIMARY_MONITOR.height
-        x, y = PRIMARY_MONITOR.x, PRIMARY_MONITOR.y
+@dataclass(frozen=True)
+class RoiLayout:
+    """Regions of interest for one screen resolution and position.
+
+    Layouts are immutable and shared, use get_roi_layout to create them.
+    """
+
+    width: int
+    height: int
+    x: int
+    y: int
+    summary: Box = field(compare=False)
+    total_kills: Box = field(compare=False)
+    top_screen: Box = field(compare=False)
+    squad_place: Box = field(compare=False)
+    players: Mapping[str, Mapping[str, Box]] = field(compare=False, repr=False)
+    boxes: Mapping[str, Box] = field(compare=False, repr=False)
+
+
+def scale_roi_vars(width: int, height: int) -> Dict[str, int]:
+    scaled_vars = {}
 
     for key, val in ROI_VARS.items():
         if "WIDTH" in key or "COL" in key:
             # scale by width
-            ROI_VARS[key] = val * width // 1920
+            scaled_vars[key] = val * width // 1920
         elif "HEIGHT" in key or "ROW" in key:
             # scale by height
-            ROI_VARS[key] = val * height // 1080
+            scaled_vars[key] = val * height // 1080
         else:
             logger.error(f"Unknown var: {key}")
 
-    calculate_rois(width, height, x, y)
+    return scaled_vars
 
 
-def calculate_rois(width: int, height: int, x: int, y: int):
-    global SQUAD_PLACE_ROI, TOTAL_KILLS_ROI, ROI_DICT, SUMMARY_ROI, TOP_SCREEN
+@lru_cache(maxsize=None)
+def get_roi_layout(width: int, height: int, x: int = 0, y: int = 0) -> RoiLayout:
+    roi_vars = scale_roi_vars(width, height)
 
-    SUMMARY_ROI = (
+    summary = (
         width // 3,
         0,
         width * 2 // 3,
         height // 10,
     )
 
-    TOP_SCREEN = (
+    top_screen = (
         x,
         y,
         x + width,
@@ -90,150 +111,82 @@ def calculate_rois(width: int, height: int, x: int, y: int):
     )
 
     # Squad placement
-    SQUAD_PLACE_ROI = (
-        ROI_VARS["SQUAD_PLACE_COL_START"],
-        ROI_VARS["TOP_ROW_START"],
-        ROI_VARS["SQUAD_PLACE_COL_START"] + ROI_VARS["SQUAD_PLACE_WIDTH"],
-        ROI_VARS["TOP_ROW_START"] + ROI_VARS["TOP_ROW_HEIGHT"],
+    squad_place = (
+        roi_vars["SQUAD_PLACE_COL_START"],
+        roi_vars["TOP_ROW_START"],
+        roi_vars["SQUAD_PLACE_COL_START"] + roi_vars["SQUAD_PLACE_WIDTH"],
+        roi_vars["TOP_ROW_START"] + roi_vars["TOP_ROW_HEIGHT"],
     )
 
     # Total kills
-    TOTAL_KILLS_ROI = (
-        ROI_VARS["TOTAL_KILL_COL_START"],
-        ROI_VARS["TOP_ROW_START"],
-        ROI_VARS["TOTAL_KILL_COL_START"] + ROI_VARS["TOTAL_KILL_WIDTH"],
-        ROI_VARS["TOP_ROW_START"] + ROI_VARS["TOP_ROW_HEIGHT"],
+    total_kills = (
+        roi_vars["TOTAL_KILL_COL_START"],
+        roi_vars["TOP_ROW_START"],
+        roi_vars["TOTAL_KILL_COL_START"] + roi_vars["TOTAL_KILL_WIDTH"],
+        roi_vars["TOP_ROW_START"] + roi_vars["TOP_ROW_HEIGHT"],
     )
 
-    # Player 1
-    ROI_DICT["P1"] = {}
-    ROI_DICT["P1"]["player"] = (
-        ROI_VARS["P1_COL_START"],
-        ROI_VARS["PLAYER_ROW_START"],
-        ROI_VARS["P1_COL_START"] + ROI_VARS["PLAYER_WIDTH"],
-        ROI_VARS["PLAYER_ROW_START"] + ROI_VARS["PLAYER_ROW_HEIGHT"],
-    )
-    ROI_DICT["P1"]["kakn"] = (
-        ROI_VARS["P1_COL_START"],
-        ROI_VARS["KAKN_ROW_START"],
-        ROI_VARS["P1_COL_START"] + ROI_VARS["KAKN_WIDTH"],
-        ROI_VARS["KAKN_ROW_START"] + ROI_VARS["PLAYER_ROW_HEIGHT"],
-    )
-    ROI_DICT["P1"]["damage"] = (
-        ROI_VARS["P1_COL_START"],
-        ROI_VARS["DAMAGE_ROW_START"],
-        ROI_VARS["P1_COL_START"] + ROI_VARS["DAMAGE_WIDTH"],
-        ROI_VARS["DAMAGE_ROW_START"] + ROI_VARS["PLAYER_ROW_HEIGHT"],
-    )
-    ROI_DICT["P1"]["survival_time"] = (
-        ROI_VARS["P1_COL_START"],
-        ROI_VARS["SURV_TIME_ROW_START"],
-        ROI_VARS["P1_COL_START"] + ROI_VARS["SURV_TIME_WIDTH"],
-        ROI_VARS["SURV_TIME_ROW_START"] + ROI_VARS["PLAYER_ROW_HEIGHT"],
-    )
-    ROI_DICT["P1"]["revives"] = (
-        ROI_VARS["P1_COL_START"],
-        ROI_VARS["REV_ROW_START"],
-        ROI_VARS["P1_COL_START"] + ROI_VARS["REV_RES_WIDTH"],
-        ROI_VARS["REV_ROW_START"] + ROI_VARS["PLAYER_ROW_HEIGHT"],
-    )
-    ROI_DICT["P1"]["respawns"] = (
-        ROI_VARS["P1_COL_START"],
-        ROI_VARS["RES_ROW_START"],
-        ROI_VARS["P1_COL_START"] + ROI_VARS["REV_RES_WIDTH"],
-        ROI_VARS["RES_ROW_START"] + ROI_VARS["PLAYER_ROW_HEIGHT"],
-    )
-
-    # Player 2
-    ROI_DICT["P2"] = {}
-    ROI_DICT["P2"]["player"] = (
-        ROI_VARS["P2_COL_START"],
-        ROI_VARS["PLAYER_ROW_START"],
-        ROI_VARS["P2_COL_START"] + ROI_VARS["PLAYER_WIDTH"],
-        ROI_VARS["PLAYER_ROW_START"] + ROI_VARS["PLAYER_ROW_HEIGHT"],
-    )
-    ROI_DICT["P2"]["kakn"] = (
-        ROI_VARS["P2_COL_START"],
-        ROI_VARS["KAKN_ROW_START"],
-        ROI_VARS["P2_COL_START"] + ROI_VARS["KAKN_WIDTH"],
-        ROI_VARS["KAKN_ROW_START"] + ROI_VARS["PLAYER_ROW_HEIGHT"],
-    )
-    ROI_DICT["P2"]["damage"] = (
-        ROI_VARS["P2_COL_START"],
-        ROI_VARS["DAMAGE_ROW_START"],
-        ROI_VARS["P2_COL_START"] + ROI_VARS["DAMAGE_WIDTH"],
-        ROI_VARS["DAMAGE_ROW_START"] + ROI_VARS["PLAYER_ROW_HEIGHT"],
-    )
-    ROI_DICT["P2"]["survival_time"] = (
-        ROI_VARS["P2_COL_START"],
-        ROI_VARS["SURV_TIME_ROW_START"],
-        ROI_VARS["P2_COL_START"] + ROI_VARS["SURV_TIME_WIDTH"],
-        ROI_VARS["SURV_TIME_ROW_START"] + ROI_VARS["PLAYER_ROW_HEIGHT"],
-    )
-    ROI_DICT["P2"]["revives"] = (
-        ROI_VARS["P2_COL_START"],
-        ROI_VARS["REV_ROW_START"],
-        ROI_VARS["P2_COL_START"] + ROI_VARS["REV_RES_WIDTH"],
-        ROI_VARS["REV_ROW_START"] + ROI_VARS["PLAYER_ROW_HEIGHT"],
-    )
-    ROI_DICT["P2"]["respawns"] = (
-        ROI_VARS["P2_COL_START"],
-        ROI_VARS["RES_ROW_START"],
-        ROI_VARS["P2_COL_START"] + ROI_VARS["REV_RES_WIDTH"],
-        ROI_VARS["RES_ROW_START"] + ROI_VARS["PLAYER_ROW_HEIGHT"],
-    )
-
-    # Player 3
-    ROI_DICT["P3"] = {}
-    ROI_DICT["P3"]["player"] = (
-        ROI_VARS["P3_COL_START"],
-        ROI_VARS["PLAYER_ROW_START"],
-        ROI_VARS["P3_COL_START"] + ROI_VARS["PLAYER_WIDTH"],
-        ROI_VARS["PLAYER_ROW_START"] + ROI_VARS["PLAYER_ROW_HEIGHT"],
-    )
-    ROI_DICT["P3"]["kakn"] = (
-        ROI_VARS["P3_COL_START"],
-        ROI_VARS["KAKN_ROW_START"],
-        ROI_VARS["P3_COL_START"] + ROI_VARS["KAKN_WIDTH"],
-        ROI_VARS["KAKN_ROW_START"] + ROI_VARS["PLAYER_ROW_HEIGHT"],
-    )
-    ROI_DICT["P3"]["damage"] = (
-        ROI_VARS["P3_COL_START"],
-        ROI_VARS["DAMAGE_ROW_START"],
-        ROI_VARS["P3_COL_START"] + ROI_VARS["DAMAGE_WIDTH"],
-        ROI_VARS["DAMAGE_ROW_START"] + ROI_VARS["PLAYER_ROW_HEIGHT"],
-    )
-    ROI_DICT["P3"]["survival_time"] = (
-        ROI_VARS["P3_COL_START"],
-        ROI_VARS["SURV_TIME_ROW_START"],
-        ROI_VARS["P3_COL_START"] + ROI_VARS["SURV_TIME_WIDTH"],
-        ROI_VARS["SURV_TIME_ROW_START"] + ROI_VARS["PLAYER_ROW_HEIGHT"],
-    )
-    ROI_DICT["P3"]["revives"] = (
-        ROI_VARS["P3_COL_START"],
-        ROI_VARS["REV_ROW_START"],
-        ROI_VARS["P3_COL_START"] + ROI_VARS["REV_RES_WIDTH"],
-        ROI_VARS["REV_ROW_START"] + ROI_VARS["PLAYER_ROW_HEIGHT"],
-    )
-    ROI_DICT["P3"]["respawns"] = (
-        ROI_VARS["P3_COL_START"],
-        ROI_VARS["RES_ROW_START"],
-        ROI_VARS["P3_COL_START"] + ROI_VARS["REV_RES_WIDTH"],
-        ROI_VARS["RES_ROW_START"] + ROI_VARS["PLAYER_ROW_HEIGHT"],
-    )
+    # Player stats
+    players = {}
+    boxes = {"squad_place": squad_place}
+
+    for player in ["P1", "P2", "P3"]:
+        col_start = roi_vars[f"{player}_COL_START"]
+        player_rois = {}
+
+        for stat, (row_var, width_var) in PLAYER_STAT_VARS.items():
+            player_rois[stat] = (
+                col_start,
+                roi_vars[row_var],
+                col_start + roi_vars[width_var],
+                roi_vars[row_var] + roi_vars["PLAYER_ROW_HEIGHT"],
+            )
+            boxes[f"{player} {stat}"] = player_rois[stat]
+
+        players[player] = MappingProxyType(player_rois)
+
+    return RoiLayout(
+        width=width,
+        height=height,
+        x=x,
+        y=y,
+        summary=summary,
+        total_kills=total_kills,
+        top_screen=top_screen,
+        squad_place=squad_place,
+        players=MappingProxyType(players),
+        boxes=MappingProxyType(boxes),
+    )
+
+
+def scale_rois(resolution: Union[Tuple[int, int], None] = None) -> RoiLayout:
+    # resolution means we are analyzing screenshot(s)
+    if resolution:
+        width, height = resolution
+        return get_roi_layout(width, height)
+    else:
+        primary_monitor = get_primary_monitor()
+        return get_roi_layout(
+            primary_monitor.width,
+            primary_monitor.height,
+            primary_monitor.x,
+            primary_monitor.y,
+        )
 
 
-def get_rois(img: Image, debug: bool = False) -> Tuple[np.ndarray, dict]:
+def get_rois(
+    img: Image, layout: RoiLayout, debug: bool = False
+) -> Tuple[np.ndarray, dict]:
     if debug:
         draw = ImageDraw.Draw(img)
         draw.rectangle((0, 0, 50, 50), width=3)
-        draw.rectangle(SQUAD_PLACE_ROI, width=3)
+        draw.rectangle(layout.squad_place, width=3)
 
-    squad_place = np.array(img.crop(SQUAD_PLACE_ROI))
+    squad_place = np.array(img.crop(layout.squad_place))
 
     players = {}
 
-    for player in ROI_DICT.items():
+    for player in layout.players.items():
         player_images = {}
         for stat in player[1].items():
             img_region = stat[1]
@@ -0,0 +1,111 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from PIL import Image
+
+from apex_ocr.backends import OCRBackend
+from apex_ocr.batching import BatchingBackend
+from apex_ocr.config import DATABASE
+from apex_ocr.engine import ApexOCREngine
+
+logger = logging.getLogger(__name__)
+
+BackendFactory = Callable[[], OCRBackend]
+EngineFactory = Callable[..., ApexOCREngine]
+
+
+class EnginePool:
+    """Warm engines shared by the requests of a long-running service.
+
+    Each request borrows an engine for OCR on the executor threads. Results are saved
+    by the first engine only, one request at a time, so they are written by a single
+    database session.
+
+    Every engine loads its own model, unless ``batching`` is set. Then the engines
+    share one model whose recognitions are batched across concurrent requests.
+    """
+
+    def __init__(
+        self,
+        n_engines: int = 1,
+        debug: bool = False,
+        database: bool = DATABASE,
+        batching: bool = False,
+        backend_factory: BackendFactory = ApexOCREngine.create_backend,
+        engine_factory: EngineFactory = ApexOCREngine,
+    ) -> None:
+        self.n_engines = n_engines
+        self.debug = debug
+        self.database = database
+        self.batching = batching
+        self.backend_factory = backend_factory
+        self.engine_factory = engine_factory
+
+        self.engines = queue.Queue()
+        self.save_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(n_engines, thread_name_prefix="apex_ocr")
+        self.ready = threading.Event()
+
+        self.persist_engine: Optional[ApexOCREngine] = None
+        self.batching_backend: Optional[BatchingBackend] = None
+
+    def load(self) -> None:
+        if self.batching:
+            self.batching_backend = BatchingBackend(self.backend_factory())
+
+        for i in range(self.n_engines):
+            backend = self.batching_backend or self.backend_factory()
+            engine = self.engine_factory(
+                database=self.database and i == 0, backend=backend
+            )
+            engine.warm_up()
+
+            if i == 0:
+                self.persist_engine = engine
+            self.engines.put(engine)
+
+            logger.info(f"Loaded engine {i + 1}/{self.n_engines}")
+
+        self.ready.set()
+
+    def ocr(self, image: Union[Image.Image, Path]) -> dict:
+        engine = self.engines.get()
+        try:
+            return engine.ocr_screenshot(image, self.debug)
+        finally:
+            self.engines.put(engine)
+
+    def save(self, results_dict: dict, image: Union[Image.Image, Path]) -> bool:
+        if not results_dict:
+            return False
+
+        with self.save_lock:
+            return self.persist_engine.save_results(results_dict, image)
+
+    def process(self, image: Union[Image.Image, Path], save: bool = True) -> dict:
+        results_dict = self.ocr(image)
+        saved = self.save(results_dict, image) if save else False
+
+        return {"results": results_dict, "saved": saved}
+
+    def metrics(self) -> dict:
+        metrics = {
+            "ready": self.ready.is_set(),
+            "engines": self.n_engines,
+            "idle_engines": self.engines.qsize(),
+        }
+
+        if self.batching_backend is not None:
+            metrics["batching"] = self.batching_backend.metrics()
+
+        return metrics
+
+    def shutdown(self) -> None:
+        self.executor.shutdown()
+
+        if self.batching_backend is not None:
+            self.batching_backend.close()
@@ -0,0 +1,195 @@
+import gc
+import logging
+import os
+import time
+from itertools import product
+from pathlib import Path
+from statistics import median
+from typing import List
+
+import click
+import numpy as np
+from PIL import Image
+from rich.console import Console
+from rich.table import Table
+
+from apex_ocr.backends import PaddleOCRBackend, save_ocr_profile
+from apex_ocr.config import IMAGE_EXTENSIONS, OCR_PROFILE_FILE
+from apex_ocr.preprocessing import FramePreprocessor
+from apex_ocr.roi import scale_rois
+
+logger = logging.getLogger(__name__)
+
+# Blur passes of a squad summary page without early exit
+BLUR_LEVELS = [0, 3, 5, 7]
+
+# Minimum fraction of texts that must match the first profile to be acceptable
+MIN_AGREEMENT = 0.99
+
+console = Console()
+
+
+def load_workload(file_list: List[Path]) -> List[np.ndarray]:
+    # Every preprocessed region the engine recognizes for each screenshot
+    images = []
+    for screenshot_path in file_list:
+        img = Image.open(screenshot_path)
+        layout = scale_rois(img.size)
+        frame = FramePreprocessor(img)
+
+        for box in layout.boxes.values():
+            images.extend(frame.preprocess(box, blur) for blur in BLUR_LEVELS)
+
+    return images
+
+
+def default_thread_counts() -> List[int]:
+    cpu_count = os.cpu_count() or 1
+
+    thread_counts = {cpu_count}
+    n = 1
+    while n < cpu_count:
+        thread_counts.add(n)
+        n *= 2
+
+    return sorted(thread_counts)
+
+
+@click.command()
+@click.argument(
+    "filepath",
+    required=True,
+    type=click.Path(exists=True, path_type=Path),
+)
+@click.option(
+    "-t",
+    "--threads",
+    "thread_counts",
+    type=click.IntRange(min=1),
+    multiple=True,
+    help="CPU thread counts to try. Defaults to powers of 2 up to the CPU count",
+)
+@click.option(
+    "-b",
+    "--batch-size",
+    "batch_sizes",
+    type=click.IntRange(min=1),
+    multiple=True,
+    default=[6, 12, 24, 48],
+    show_default=True,
+    help="Recognition batch sizes to try",
+)
+@click.option(
+    "-n", "--repeat", type=click.IntRange(min=1), show_default=True, default=3
+)
+@click.option(
+    "-m",
+    "--max-screenshots",
+    type=click.IntRange(min=1),
+    show_default=True,
+    default=8,
+)
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    show_default=True,
+    default=OCR_PROFILE_FILE,
+)
+def tune(
+    filepath: Path,
+    thread_counts: List[int],
+    batch_sizes: List[int],
+    repeat: int,
+    max_screenshots: int,
+    output: Path,
+) -> None:
+    """Find the fastest CPU inference settings for this machine.
+
+    Recognizes the regions of the screenshots in FILEPATH with every combination of
+    settings and saves the fastest one as the OCR profile, which is used by every
+    engine created afterwards.
+    """
+    if filepath.is_dir():
+        file_list = sorted(
+            path
+            for path in filepath.iterdir()
+            if path.is_file() and path.suffix in IMAGE_EXTENSIONS
+        )
+    else:
+        file_list = [filepath]
+
+    images = load_workload(file_list[:max_screenshots])
+    if not images:
+        raise click.ClickException(f"No screenshots found in {filepath}")
+
+    thread_counts = thread_counts or default_thread_counts()
+    console.print(
+        f"Tuning on {len(images)} regions of {min(len(file_list), max_screenshots)} "
+        f"screenshots"
+    )
+
+    table = Table(title="OCR profiles")
+    for column in ["Threads", "Batch size", "MKL-DNN", "Regions/s", "Agreement"]:
+        table.add_column(column, justify="right")
+
+    reference_texts = None
+    best_profile, best_speed = None, 0.0
+
+    for cpu_threads, rec_batch_num, enable_mkldnn in product(
+        thread_counts, batch_sizes, [False, True]
+    ):
+        profile = {
+            "cpu_threads": cpu_threads,
+            "enable_mkldnn": enable_mkldnn,
+            "rec_batch_num": rec_batch_num,
+            "use_gpu": False,
+        }
+
+        try:
+            backend = PaddleOCRBackend(**profile)
+
+            # Warm up before timing
+            texts = [text for text, _ in backend.recognize(images)]
+
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                backend.recognize(images)
+                timings.append(time.perf_counter() - start)
+        except Exception as e:
+            logger.warning(f"Skipping OCR profile {profile}: {e}")
+            continue
+        finally:
+            # Release the model before loading the next one
+            backend = None
+            gc.collect()
+
+        if reference_texts is None:
+            reference_texts = texts
+
+        agreement = np.mean([a == b for a, b in zip(texts, reference_texts)])
+        speed = len(images) / median(timings)
+
+        table.add_row(
+            str(cpu_threads),
+            str(rec_batch_num),
+            "yes" if enable_mkldnn else "no",
+            f"{speed:.1f}",
+            f"{agreement:.1%}",
+        )
+
+        if agreement >= MIN_AGREEMENT and speed > best_speed:
+            best_profile, best_speed = profile, speed
+
+    console.print(table)
+
+    if best_profile is None:
+        raise click.ClickException("No OCR profile could be benchmarked")
+
+    save_ocr_profile(best_profile, output)
+    console.print(f"Saved {best_profile} ({best_speed:.1f} regions/s) to {output}")
+
+
+if __name__ == "__main__":
+    tune()
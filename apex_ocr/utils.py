@@ -1,18 +1,24 @@
-import csv
 import hashlib
 import json
 import logging
+import os
+import sys
+import tempfile
+from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import List
+from typing import IO, TYPE_CHECKING, Callable, List, Optional, Tuple
 
 import numpy as np
-import pandas as pd
 from rich.align import Align
 from rich.columns import Columns
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
-from screeninfo import Monitor, get_monitors
+
+if TYPE_CHECKING:
+    from PIL import Image
+    from screeninfo import Monitor
 
 logger = logging.getLogger(__name__)
 console = Console()
@@ -36,7 +42,11 @@ REPLACEMENTS = [
 ]
 
 
-def get_primary_monitor() -> Monitor:
+@lru_cache(maxsize=None)
+def get_primary_monitor() -> "Monitor":
+    # Imported on first use, looking up monitors is slow or fails on headless servers
+    from screeninfo import Monitor, get_monitors
+
     primary_monitor = Monitor(0, 0, 0, 0)
     for m in get_monitors():
         if m.is_primary:
@@ -48,6 +58,33 @@ def get_primary_monitor() -> Monitor:
     return primary_monitor
 
 
+def grab_screen(bbox: Optional[Tuple[int, int, int, int]] = None) -> "Image.Image":
+    # Imported on first use, screen capture is unavailable on headless servers
+    from PIL import ImageGrab
+
+    return ImageGrab.grab(bbox=bbox)
+
+
+def replace_file(filepath: Path, write: Callable[[IO[bytes]], None]) -> None:
+    # Written next to the file and swapped in, so that engines and processes sharing
+    # the file never read or overwrite a partially written one
+    fd, temp_path = tempfile.mkstemp(
+        dir=filepath.parent, prefix=f".{filepath.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(temp_path, filepath)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def get_screenshot_datetime(screenshot_path: Path) -> datetime:
+    # Screenshots do not have EXIF data so must resort to file OS stats
+    return datetime.fromtimestamp(screenshot_path.stat().st_ctime, tz=timezone.utc)
+
+
 def display_results(results: dict) -> None:
     player_tables = [
         Table(show_header=False),
@@ -148,12 +185,16 @@ def hash_dict(d: dict) -> str:
         str: Hash string.
     """
 
+    # Results can only contain pandas objects if pandas was already imported
+    pd = sys.modules.get("pandas")
+    array_types = (np.ndarray, pd.Series) if pd is not None else (np.ndarray,)
+
     # Collapse the dictionary to a single representation
     def immutify_dictionary(d):
         d_new = {}
         for k, v in d.items():
             # convert to python native immutables
-            if isinstance(v, (np.ndarray, pd.Series)):
+            if isinstance(v, array_types):
                 d_new[k] = tuple(v.tolist())
 
             # immutify any lists
@@ -180,27 +221,35 @@ def hash_dict(d: dict) -> str:
     return m
 
 
-def write_to_file(filepath: Path, headers: List[str], data: dict) -> bool:
-    try:
-        value_list = [data[header] for header in headers]
-    except KeyError as key:
-        logger.error(f"{key} does not exist in data!")
+def is_valid_results(results: dict) -> bool:
+    results_copy = results.copy()
+
+    # Check for empty results dictionary
+    if not results_copy:
+        logger.error("Empty results!")
         return False
 
-    if filepath.is_file():
-        # Append the game data
-        write_method = "a"
-        rows_to_write = [value_list]
-    else:
-        # Write header row then game data
-        write_method = "w"
-        rows_to_write = [headers, value_list]
+    # Check for "n/a" in squad placement
+    if "n/a" in results_copy.values():
+        logger.error("N/A found in results!")
+        return False
 
-    # TODO: Parse file for duplicate hash
+    # Check for valid squad placement range
+    if results["Place"] < 0 or results["Place"] > 20:
+        logger.error("Invalid value for squad placement!")
+        return False
 
-    with open(filepath, write_method, newline="") as f:
-        writer = csv.writer(f)
-        for row in rows_to_write:
-            writer.writerow(row)
+    # Check for any fields with empty strings except for clan tag
+    p1_clan_tag = results_copy.pop("P1 Clan")
+    p2_clan_tag = results_copy.pop("P2 Clan")
+    p3_clan_tag = results_copy.pop("P3 Clan")
+    if "" in results_copy.values():
+        logger.error("Empty string in results!")
+        return False
+
+    # Check for invalid kills / assists / knockdowns
+    if -1 in results_copy.values():
+        logger.error("Inalid Kills/Assists/Knocks in results!")
+        return False
 
     return True
@@ -0,0 +1,269 @@
+import asyncio
+import io
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Tuple
+
+from fastapi import FastAPI, File, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+from PIL import Image, UnidentifiedImageError
+from starlette.requests import ClientDisconnect
+from starlette.types import Receive, Scope, Send
+
+from apex_ocr.service import EnginePool
+
+logger = logging.getLogger(__name__)
+
+
+def decode_image(data: bytes) -> Image.Image:
+    image = Image.open(io.BytesIO(data))
+    # Decode now rather than lazily on the thread performing OCR
+    image.load()
+    return image
+
+
+class MultipartFileStream:
+    """Incremental parser of the files uploaded in a multipart/form-data body.
+
+    Chunks of the body are fed as they are received and the files completed by each
+    chunk are returned, so only the file being received is held in memory. Parts
+    that are not files are ignored.
+    """
+
+    def __init__(self, boundary: bytes) -> None:
+        self.files: List[Tuple[str, bytes]] = []
+        self.headers = {}
+        self.header_field = b""
+        self.header_value = b""
+        self.data = bytearray()
+
+        self.parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self.on_part_begin,
+                "on_header_field": self.on_header_field,
+                "on_header_value": self.on_header_value,
+                "on_header_end": self.on_header_end,
+                "on_part_data": self.on_part_data,
+                "on_part_end": self.on_part_end,
+            },
+        )
+
+    def on_part_begin(self) -> None:
+        self.headers = {}
+        self.data = bytearray()
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self.header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self.header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self.headers[self.header_field.lower()] = self.header_value
+        self.header_field = b""
+        self.header_value = b""
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        self.data += data[start:end]
+
+    def on_part_end(self) -> None:
+        _, options = parse_options_header(self.headers.get(b"content-disposition", b""))
+
+        if b"filename" in options:
+            filename = options[b"filename"].decode("utf-8", errors="replace")
+            self.files.append((filename, bytes(self.data)))
+
+        self.data = bytearray()
+
+    def feed(self, chunk: bytes) -> List[Tuple[str, bytes]]:
+        self.parser.write(chunk)
+
+        files, self.files = self.files, []
+        return files
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """Streaming response that is sent while the request body is still received.
+
+    StreamingResponse reads the request to detect a disconnection, which would
+    consume the body the response is generated from. The body stream raises
+    ClientDisconnect instead.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+
+
+def create_app(pool: EnginePool) -> FastAPI:
+    """Create the HTTP API around a pool of engines.
+
+    Engines are loaded and warmed up in the background after startup, so the health
+    check answers immediately and uploads are rejected with 503 until the engines are
+    ready. OCR runs on the threads of the pool and never blocks the event loop.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        loop = asyncio.get_running_loop()
+        app.state.load_task = loop.run_in_executor(None, pool.load)
+        app.state.load_task.add_done_callback(log_load_error)
+
+        yield
+
+        pool.shutdown()
+
+    def log_load_error(future: asyncio.Future) -> None:
+        if future.exception() is not None:
+            logger.error(f"Failed to load engines: {future.exception()}")
+
+    app = FastAPI(title="Apex OCR", lifespan=lifespan)
+    app.state.pool = pool
+
+    @app.get("/health")
+    async def health() -> dict:
+        return {"status": "ok"}
+
+    @app.get("/ready")
+    async def ready() -> dict:
+        if not pool.ready.is_set():
+            raise HTTPException(status_code=503, detail="Engines are loading")
+        return {"status": "ready", "engines": pool.n_engines}
+
+    @app.get("/metrics")
+    async def metrics() -> dict:
+        return pool.metrics()
+
+    def check_ready() -> None:
+        if not pool.ready.is_set():
+            raise HTTPException(
+                status_code=503,
+                detail="Engines are loading",
+                headers={"Retry-After": "5"},
+            )
+
+    @app.post("/uploadfile/")
+    async def upload_file(file: UploadFile = File(...), save: bool = True) -> dict:
+        check_ready()
+
+        loop = asyncio.get_running_loop()
+        data = await file.read()
+
+        try:
+            image = await loop.run_in_executor(None, decode_image, data)
+        except UnidentifiedImageError:
+            raise HTTPException(
+                status_code=400, detail=f"{file.filename} is not an image"
+            )
+
+        try:
+            response = await loop.run_in_executor(
+                pool.executor, pool.process, image, save
+            )
+        except Exception as e:
+            logger.error(f"Failed to process {file.filename}: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+        return {"filename": file.filename, **response}
+
+    def process_upload(data: bytes, save: bool) -> dict:
+        return pool.process(decode_image(data), save)
+
+    async def stream_results(
+        request: Request, boundary: bytes, save: bool
+    ) -> AsyncIterator[bytes]:
+        loop = asyncio.get_running_loop()
+        stream = MultipartFileStream(boundary)
+
+        # Stop reading the body while enough screenshots are waiting for an engine
+        max_pending = 2 * pool.n_engines
+        pending = {}
+
+        def result_line(future: asyncio.Future) -> bytes:
+            index, filename = pending.pop(future)
+            response = {"index": index, "filename": filename}
+
+            try:
+                response.update(future.result())
+            except Exception as e:
+                logger.error(f"Failed to process {filename}: {e}")
+                response["error"] = str(e)
+
+            return json.dumps(response, default=str).encode("utf-8") + b"\n"
+
+        # Wait for the next chunk of the body and the pending screenshots at once
+        chunks = request.stream().__aiter__()
+        next_chunk = asyncio.ensure_future(chunks.__anext__())
+        n_files = 0
+
+        while next_chunk is not None or pending:
+            waiting = set(pending)
+            if next_chunk is not None and len(pending) < max_pending:
+                waiting.add(next_chunk)
+
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+            for future in done:
+                if future is not next_chunk:
+                    yield result_line(future)
+                    continue
+
+                try:
+                    chunk = future.result()
+                except StopAsyncIteration:
+                    next_chunk = None
+                    continue
+                except ClientDisconnect:
+                    logger.warning(
+                        f"Client disconnected after uploading {n_files} files"
+                    )
+                    return
+
+                try:
+                    files = stream.feed(chunk)
+                except MultipartParseError as e:
+                    # The response has started, so the error ends the stream once
+                    # the files received so far are processed
+                    logger.error(f"Malformed upload after {n_files} files: {e}")
+                    yield json.dumps({"error": f"Malformed upload: {e}"}).encode(
+                        "utf-8"
+                    ) + b"\n"
+                    next_chunk = None
+                    continue
+
+                for filename, data in files:
+                    future = loop.run_in_executor(
+                        pool.executor, process_upload, data, save
+                    )
+                    pending[future] = (n_files, filename)
+                    n_files += 1
+
+                next_chunk = asyncio.ensure_future(chunks.__anext__())
+
+    @app.post("/uploadfiles/")
+    async def upload_files(request: Request, save: bool = True) -> StreamingResponse:
+        """Perform OCR on every file of a multipart upload as it is received.
+
+        One JSON line is streamed per file as soon as it is processed, in the order
+        the files finish, with the index of the file in the upload. A malformed body
+        stops the upload with a line holding only an error.
+        """
+        check_ready()
+
+        content_type, options = parse_options_header(
+            request.headers.get("content-type", "")
+        )
+        if content_type != b"multipart/form-data" or b"boundary" not in options:
+            raise HTTPException(
+                status_code=400, detail="Expected a multipart/form-data upload"
+            )
+
+        return DuplexStreamingResponse(
+            stream_results(request, options[b"boundary"], save),
+            media_type="application/x-ndjson",
+        )
+
+    return app
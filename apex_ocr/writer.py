@@ -0,0 +1,356 @@
+import atexit
+import csv
+import logging
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Union
+
+from apex_ocr import utils
+from apex_ocr.config import (
+    CSV_FLUSH_INTERVAL,
+    CSV_FLUSH_SIZE,
+    PARQUET_FLUSH_INTERVAL,
+    PARQUET_ROW_GROUP_SIZE,
+)
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+
+class CsvResultWriter:
+    """Buffered writer of results to a CSV file that skips duplicate hashes.
+
+    The hashes already in the file are read once when the writer is created. Rows
+    are buffered and appended to the file every ``flush_size`` rows, once the
+    oldest buffered row is ``flush_interval`` seconds old, or when the writer is
+    flushed or closed. Safe to use from several threads.
+    """
+
+    def __init__(
+        self,
+        filepath: Path,
+        headers: List[str],
+        flush_size: int = CSV_FLUSH_SIZE,
+        flush_interval: float = CSV_FLUSH_INTERVAL,
+    ) -> None:
+        self.filepath = filepath
+        self.headers = headers
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+
+        self.lock = threading.Lock()
+        self.rows: List[list] = []
+        self.timer: Optional[threading.Timer] = None
+
+        self.hashes = self.read_hashes()
+        # Hashes of the buffered rows
+        self.buffered: Set[str] = set()
+        self.file = None
+        self.writer = None
+
+    def read_hashes(self) -> Set[str]:
+        if not self.filepath.is_file():
+            return set()
+
+        with open(self.filepath, newline="") as f:
+            reader = csv.reader(f)
+            file_headers = next(reader, [])
+            if "Hash" not in file_headers:
+                return set()
+
+            hash_index = file_headers.index("Hash")
+            hashes = {row[hash_index] for row in reader if len(row) > hash_index}
+
+        logger.debug(f"Loaded {len(hashes)} result hashes from {self.filepath.name}")
+        return hashes
+
+    def write(self, data: dict) -> bool:
+        """Buffer the row of a result.
+
+        Args:
+            data (dict): Result with a value for every header.
+
+        Returns:
+            bool: Whether the result was written, results with missing values or
+                with a hash that is already in the file are not.
+        """
+        try:
+            row = [data[header] for header in self.headers]
+        except KeyError as key:
+            logger.error(f"{key} does not exist in data!")
+            return False
+
+        with self.lock:
+            results_hash = data.get("Hash")
+            if results_hash in self.hashes:
+                logger.debug(f"Results {results_hash} already in {self.filepath.name}")
+                return False
+
+            if results_hash is not None:
+                self.hashes.add(results_hash)
+                self.buffered.add(results_hash)
+
+            self.rows.append(row)
+
+            if len(self.rows) >= self.flush_size:
+                self._flush()
+            elif self.timer is None:
+                # Flush results that are not followed by enough others in time
+                self.timer = threading.Timer(self.flush_interval, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+        return True
+
+    def _flush(self) -> None:
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        if not self.rows:
+            return
+
+        if self.file is None:
+            write_headers = (
+                not self.filepath.is_file() or self.filepath.stat().st_size == 0
+            )
+            self.file = open(self.filepath, "a", newline="")
+            self.writer = csv.writer(self.file)
+
+            if write_headers:
+                self.writer.writerow(self.headers)
+
+        self.writer.writerows(self.rows)
+        self.file.flush()
+
+        logger.debug(f"Wrote {len(self.rows)} results to {self.filepath.name}")
+        self.rows = []
+        self.buffered.clear()
+
+    def is_written(self, results_hash: str) -> bool:
+        # Whether the results are in the file rather than only in the buffer
+        with self.lock:
+            return results_hash not in self.buffered
+
+    def flush(self) -> None:
+        with self.lock:
+            self._flush()
+
+    def close(self) -> None:
+        with self.lock:
+            self._flush()
+
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+# Types of the squad stats by the last word of their header
+INTEGER_STATS = {"Place", "Kills", "Assists", "Knocks", "Damage", "Revives", "Respawns"}
+
+
+def squad_stats_schema(headers: List[str]) -> "pa.Schema":
+    import pyarrow as pa
+
+    fields = []
+    for header in headers:
+        if header == "Datetime":
+            data_type = pa.timestamp("us", tz="UTC")
+        elif header.endswith("Time Survived"):
+            data_type = pa.duration("s")
+        elif header.split(" ")[-1] in INTEGER_STATS:
+            data_type = pa.int32()
+        else:
+            data_type = pa.string()
+        fields.append(pa.field(header, data_type))
+
+    return pa.schema(fields)
+
+
+class ParquetResultWriter:
+    """Buffered writer of results to a Parquet dataset partitioned by month.
+
+    Buffered results are written every ``row_group_size`` results, once the oldest
+    buffered result is ``flush_interval`` seconds old, or when the writer is flushed
+    or closed. Each flush writes one complete file per month directory, named
+    ``month=YYYY-MM``, under a name starting with an underscore so that readers of
+    the dataset skip it until it is renamed. Results whose hash is already in the
+    dataset are not written again.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        headers: List[str],
+        row_group_size: int = PARQUET_ROW_GROUP_SIZE,
+        flush_interval: float = PARQUET_FLUSH_INTERVAL,
+    ) -> None:
+        # Optional dependency, only needed when Parquet output is enabled
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.pq = pq
+
+        self.directory = directory
+        self.headers = headers
+        self.row_group_size = row_group_size
+        self.flush_interval = flush_interval
+        self.schema = squad_stats_schema(headers)
+
+        self.lock = threading.Lock()
+        self.rows: List[dict] = []
+        self.timer: Optional[threading.Timer] = None
+        self.n_files = 0
+
+        self.hashes = self.read_hashes()
+        # Hashes of the buffered rows
+        self.buffered: Set[str] = set()
+
+    def read_hashes(self) -> Set[str]:
+        if not self.directory.is_dir():
+            return set()
+
+        import pyarrow.dataset as ds
+
+        # Only the hash column is read
+        try:
+            table = ds.dataset(self.directory, partitioning="hive").to_table(
+                columns=["Hash"]
+            )
+        except self.pa.ArrowException as e:
+            logger.warning(f"Failed to read hashes from {self.directory}: {e}")
+            return set()
+
+        return set(table.column("Hash").to_pylist())
+
+    def convert(self, data: dict) -> dict:
+        row = {header: data[header] for header in self.headers}
+
+        for header in self.headers:
+            if header.endswith("Time Survived"):
+                try:
+                    row[header] = timedelta(
+                        seconds=utils.time_survived_to_seconds(row[header])
+                    )
+                except ValueError:
+                    row[header] = None
+
+        return row
+
+    def write(self, data: dict) -> bool:
+        try:
+            row = self.convert(data)
+        except KeyError as key:
+            logger.error(f"{key} does not exist in data!")
+            return False
+
+        with self.lock:
+            if row["Hash"] in self.hashes:
+                logger.debug(f"Results {row['Hash']} already in {self.directory.name}")
+                return False
+
+            self.hashes.add(row["Hash"])
+            self.buffered.add(row["Hash"])
+            self.rows.append(row)
+
+            if len(self.rows) >= self.row_group_size:
+                self._flush()
+            elif self.timer is None:
+                # Flush results that are not followed by enough others in time
+                self.timer = threading.Timer(self.flush_interval, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+        return True
+
+    def partition(self, row: dict) -> str:
+        return f"month={row['Datetime'].strftime('%Y-%m')}"
+
+    def _flush(self) -> None:
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        if not self.rows:
+            return
+
+        partitions = defaultdict(list)
+        for row in self.rows:
+            partitions[self.partition(row)].append(row)
+
+        # One file with a single row group per month of the buffered results
+        for partition, rows in partitions.items():
+            partition_directory = self.directory / partition
+            partition_directory.mkdir(parents=True, exist_ok=True)
+
+            filename = (
+                f"part-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-"
+                f"{os.getpid()}-{self.n_files}.parquet"
+            )
+            self.n_files += 1
+
+            self.pq.write_table(
+                self.pa.Table.from_pylist(rows, schema=self.schema),
+                partition_directory / f"_{filename}",
+                row_group_size=len(rows),
+            )
+
+            # Complete files are visible to readers of the dataset
+            (partition_directory / f"_{filename}").rename(
+                partition_directory / filename
+            )
+
+        logger.debug(f"Wrote {len(self.rows)} results to {self.directory.name}")
+        self.rows = []
+        self.buffered.clear()
+
+    def is_written(self, results_hash: str) -> bool:
+        # Whether the results are in the dataset rather than only in the buffer
+        with self.lock:
+            return results_hash not in self.buffered
+
+    def flush(self) -> None:
+        with self.lock:
+            self._flush()
+
+    def close(self) -> None:
+        self.flush()
+
+
+# One writer per file shared by every engine of the process
+_writers: Dict[Path, Union[CsvResultWriter, ParquetResultWriter]] = {}
+_writers_lock = threading.Lock()
+
+
+def get_result_writer(filepath: Path, headers: List[str]) -> CsvResultWriter:
+    with _writers_lock:
+        writer = _writers.get(filepath)
+        if writer is None:
+            writer = CsvResultWriter(filepath, headers)
+            _writers[filepath] = writer
+
+    return writer
+
+
+def get_parquet_writer(directory: Path, headers: List[str]) -> ParquetResultWriter:
+    with _writers_lock:
+        writer = _writers.get(directory)
+        if writer is None:
+            writer = ParquetResultWriter(directory, headers)
+            _writers[directory] = writer
+
+    return writer
+
+
+@atexit.register
+def close_result_writers() -> None:
+    with _writers_lock:
+        for writer in _writers.values():
+            writer.close()
+        _writers.clear()
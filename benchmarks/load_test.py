@@ -0,0 +1,354 @@
+import asyncio
+import io
+import json
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import click
+import httpx
+import numpy as np
+import uvicorn
+from rich.console import Console
+from rich.table import Table
+from synthetic import RESOLUTIONS, register_screen, render_screen
+
+from apex_ocr.backends import StubBackend
+from apex_ocr.config import IMAGE_EXTENSIONS, SERVER_PORT
+from apex_ocr.digits import DigitRecognizer
+from apex_ocr.engine import ApexOCREngine
+from apex_ocr.service import EnginePool
+from apex_ocr.webapp import create_app
+
+console = Console()
+
+
+@dataclass
+class RequestResult:
+    latency: float
+    status: Optional[int]
+    error: Optional[str] = None
+    results_hash: Optional[str] = None
+
+
+def load_payloads(filepath: Path) -> List[Tuple[str, bytes]]:
+    if filepath.is_dir():
+        file_list = sorted(
+            path
+            for path in filepath.iterdir()
+            if path.is_file() and path.suffix in IMAGE_EXTENSIONS
+        )
+    else:
+        file_list = [filepath]
+
+    return [(path.name, path.read_bytes()) for path in file_list]
+
+
+def create_stub_engine(database: bool, backend: StubBackend) -> ApexOCREngine:
+    engine = ApexOCREngine(database=database, parallel=False, backend=backend)
+
+    # Nothing learned from stub results is saved over what real screenshots taught
+    if engine.digit_recognizer is not None:
+        engine.digit_recognizer = DigitRecognizer(glyphs_file=None)
+    engine.summary_gate = None
+
+    return engine
+
+
+def synthetic_payloads(stub: StubBackend, n_screens: int) -> List[Tuple[str, bytes]]:
+    # Screenshots of every resolution whose texts the stub reads back
+    engine = create_stub_engine(database=False, backend=stub)
+    resolutions = list(RESOLUTIONS.items())
+
+    payloads = []
+    for seed in range(n_screens):
+        name, (width, height) = resolutions[seed % len(resolutions)]
+        screen = render_screen(width, height, seed)
+        register_screen(stub, engine, screen)
+
+        buffer = io.BytesIO()
+        screen.image.save(buffer, format="PNG")
+        payloads.append((f"synthetic_{name}_{seed}.png", buffer.getvalue()))
+
+    return payloads
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(pool: EnginePool, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(
+        uvicorn.Config(create_app(pool), port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+
+    while not server.started:
+        time.sleep(0.01)
+
+    return server
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float) -> None:
+    deadline = time.perf_counter() + timeout
+
+    while True:
+        try:
+            response = await client.get("/ready")
+            if response.status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+
+        if time.perf_counter() > deadline:
+            raise click.ClickException(f"Server not ready after {timeout} seconds")
+        await asyncio.sleep(0.5)
+
+
+async def send_request(
+    client: httpx.AsyncClient, filename: str, data: bytes, save: bool
+) -> RequestResult:
+    start = time.perf_counter()
+
+    try:
+        response = await client.post(
+            "/uploadfile/",
+            params={"save": save},
+            files={"file": (filename, data, "image/png")},
+        )
+    except httpx.HTTPError as e:
+        return RequestResult(time.perf_counter() - start, None, error=repr(e))
+
+    latency = time.perf_counter() - start
+
+    if response.status_code != 200:
+        return RequestResult(latency, response.status_code, error=response.text)
+
+    results = response.json()["results"]
+    return RequestResult(
+        latency, response.status_code, results_hash=results.get("Hash")
+    )
+
+
+async def run_load(
+    url: str,
+    payloads: List[Tuple[str, bytes]],
+    n_requests: int,
+    concurrency: int,
+    rate: Optional[float],
+    save: bool,
+    ready_timeout: float,
+) -> Tuple[List[RequestResult], float, dict]:
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=None) as client:
+        await wait_until_ready(client, ready_timeout)
+
+        # At most `concurrency` requests in flight, started at `rate` per second
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks = []
+
+        async def send(i: int) -> RequestResult:
+            try:
+                filename, data = payloads[i % len(payloads)]
+                return await send_request(client, filename, data, save)
+            finally:
+                semaphore.release()
+
+        start = time.perf_counter()
+        for i in range(n_requests):
+            if rate is not None:
+                await asyncio.sleep(max(start + i / rate - time.perf_counter(), 0))
+
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(send(i)))
+
+        results = await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+        response = await client.get("/metrics")
+        metrics = response.json() if response.status_code == 200 else {}
+
+    return results, elapsed, metrics
+
+
+def summarize(results: List[RequestResult], elapsed: float) -> dict:
+    latencies = np.array([result.latency for result in results]) * 1000
+    hashes = [result.results_hash for result in results if result.results_hash]
+
+    return {
+        "requests": len(results),
+        "errors": sum(result.error is not None for result in results),
+        # Results that were already returned for an earlier request
+        "duplicates": len(hashes) - len(set(hashes)),
+        "empty_results": sum(
+            result.error is None and result.results_hash is None for result in results
+        ),
+        "throughput_rps": len(results) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+    }
+
+
+@click.command()
+@click.argument(
+    "filepath", required=False, type=click.Path(exists=True, path_type=Path)
+)
+@click.option("--url", show_default=True, default=f"http://localhost:{SERVER_PORT}")
+@click.option(
+    "-c", "--concurrency", type=click.IntRange(min=1), default=4, show_default=True
+)
+@click.option(
+    "-r",
+    "--rate",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Requests started per second. Defaults to as fast as the concurrency allows",
+)
+@click.option(
+    "-n",
+    "--requests",
+    "n_requests",
+    type=click.IntRange(min=1),
+    help="Number of requests, screenshots are replayed in a loop. "
+    "Defaults to one per screenshot",
+)
+@click.option(
+    "--save",
+    is_flag=True,
+    default=False,
+    help="Let the server save the results to the CSV and database",
+)
+@click.option(
+    "--self-contained",
+    is_flag=True,
+    default=False,
+    help="Start the server in this process with a stub OCR backend and no "
+    "persistence instead of connecting to --url",
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Workers of the self-contained server",
+)
+@click.option(
+    "--batching/--no-batching",
+    default=True,
+    show_default=True,
+    help="Batching of the self-contained server",
+)
+@click.option(
+    "--stub-latency",
+    type=click.FloatRange(min=0),
+    default=0.0,
+    show_default=True,
+    help="Seconds taken by every call to the stub backend",
+)
+@click.option(
+    "--screens",
+    type=click.IntRange(min=1),
+    default=12,
+    show_default=True,
+    help="Synthetic screenshots sent to the self-contained server without FILEPATH",
+)
+@click.option("--ready-timeout", type=float, default=120, show_default=True)
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Also write the JSON summary to a file",
+)
+def load_test(
+    filepath: Optional[Path],
+    url: str,
+    concurrency: int,
+    rate: Optional[float],
+    n_requests: Optional[int],
+    save: bool,
+    self_contained: bool,
+    workers: int,
+    batching: bool,
+    stub_latency: float,
+    screens: int,
+    ready_timeout: float,
+    output: Optional[Path],
+) -> None:
+    """Replay screenshots against the OCR server and report latency and throughput.
+
+    With --self-contained, the server runs in this process on a stub backend, so the
+    scaling of the server can be measured without a GPU or models. Without FILEPATH,
+    it is sent synthetic screenshots whose texts the stub reads back, which go
+    through the whole OCR path. Other screenshots are only classified.
+    """
+    server = None
+
+    if self_contained:
+        stub = StubBackend(latency=stub_latency)
+        payloads = (
+            load_payloads(filepath) if filepath else synthetic_payloads(stub, screens)
+        )
+
+        pool = EnginePool(
+            workers,
+            database=False,
+            batching=batching,
+            backend_factory=lambda: stub,
+            engine_factory=create_stub_engine,
+        )
+        port = get_free_port()
+        server = start_server(pool, port)
+        url = f"http://127.0.0.1:{port}"
+        save = False
+    elif filepath is None:
+        raise click.UsageError("FILEPATH is required unless --self-contained is set")
+    else:
+        payloads = load_payloads(filepath)
+
+    if not payloads:
+        raise click.ClickException(f"No screenshots found in {filepath}")
+
+    n_requests = n_requests or len(payloads)
+    console.print(
+        f"Sending {n_requests} requests of {len(payloads)} screenshots to {url} "
+        f"with concurrency {concurrency}" + (f" at {rate} requests/s" if rate else "")
+    )
+
+    try:
+        results, elapsed, metrics = asyncio.run(
+            run_load(url, payloads, n_requests, concurrency, rate, save, ready_timeout)
+        )
+    finally:
+        if server is not None:
+            server.should_exit = True
+
+    summary = summarize(results, elapsed)
+
+    table = Table(title="Load test")
+    table.add_column("Metric")
+    table.add_column("Value", justify="right")
+    for key, value in summary.items():
+        table.add_row(key, f"{value:.1f}" if isinstance(value, float) else str(value))
+    console.print(table)
+
+    errors = [result.error for result in results if result.error is not None]
+    if errors:
+        console.print(f"First error: {errors[0]}")
+
+    if metrics:
+        console.print(f"Server metrics: {metrics}")
+
+    if output is not None:
+        with open(output, "w") as f:
+            json.dump({"summary": summary, "server_metrics": metrics}, f, indent=2)
+
+
+if __name__ == "__main__":
+    load_test()
@@ -0,0 +1,70 @@
+import time
+from pathlib import Path
+from statistics import mean, median
+
+import click
+from PIL import Image
+
+from apex_ocr.config import IMAGE_EXTENSIONS, PARALLEL_THREADS
+from apex_ocr.engine import ApexOCREngine
+
+
+def time_engine(engine: ApexOCREngine, images: list, repeat: int) -> list:
+    timings = []
+
+    for _ in range(repeat):
+        for image in images:
+            start = time.perf_counter()
+            engine.process_squad_summary_page(image)
+            timings.append(time.perf_counter() - start)
+
+    return timings
+
+
+@click.command()
+@click.argument(
+    "filepath",
+    required=True,
+    type=click.Path(exists=True, path_type=Path),
+)
+@click.option("-r", "--repeat", type=int, show_default=True, default=3)
+@click.option("-t", "--threads", type=int, show_default=True, default=PARALLEL_THREADS)
+def parallel_speedup(filepath: Path, repeat: int, threads: int) -> None:
+    """Compare squad summary OCR time of the sequential and thread pool paths."""
+    if filepath.is_dir():
+        file_list = sorted(
+            path
+            for path in filepath.iterdir()
+            if path.is_file() and path.suffix in IMAGE_EXTENSIONS
+        )
+    else:
+        file_list = [filepath]
+
+    images = [Image.open(path).convert("RGB") for path in file_list]
+
+    # Every pass must reach the recognizer so the result cache is disabled
+    sequential_engine = ApexOCREngine(adaptive=False, database=False, parallel=False)
+    sequential_engine.ocr_cache.maxsize = 0
+
+    parallel_engine = ApexOCREngine(adaptive=False, database=False, parallel=True)
+    parallel_engine.recognizer_pool.shutdown()
+    parallel_engine.recognizer_pool = parallel_engine.create_recognizer_pool(threads)
+    parallel_engine.ocr_cache.maxsize = 0
+
+    # Warm up so that every thread has loaded its recognizer
+    time_engine(sequential_engine, images[:1], 1)
+    time_engine(parallel_engine, images[:1], 1)
+
+    sequential = time_engine(sequential_engine, images, repeat)
+    parallel = time_engine(parallel_engine, images, repeat)
+
+    print(f"Screenshots: {len(images)} x {repeat} repeats, {threads} threads")
+    print(f"Sequential: mean {mean(sequential):.3f}s, median {median(sequential):.3f}s")
+    print(f"Parallel:   mean {mean(parallel):.3f}s, median {median(parallel):.3f}s")
+    print(f"Speedup:    {sum(sequential) / sum(parallel):.2f}x")
+
+    parallel_engine.recognizer_pool.shutdown()
+
+
+if __name__ == "__main__":
+    parallel_speedup()
@@ -0,0 +1,284 @@
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+from statistics import mean, median
+from tempfile import TemporaryDirectory
+from typing import Callable, Dict, List, Optional
+
+import click
+import numpy as np
+from synthetic import RESOLUTIONS, SyntheticScreen, register_screen, render_screen
+
+from apex_ocr import utils
+from apex_ocr.backends import StubBackend
+from apex_ocr.database.api import ApexDatabaseApi
+from apex_ocr.database.models import Base
+from apex_ocr.digits import DigitRecognizer
+from apex_ocr.engine import ApexOCREngine
+from apex_ocr.preprocessing import preprocess_image
+from apex_ocr.roi import get_roi_layout, get_rois, scale_rois
+from apex_ocr.writer import CsvResultWriter
+
+
+def time_stage(fn: Callable, repeat: int) -> Dict[str, float]:
+    # Milliseconds per call
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "mean_ms": mean(timings),
+        "median_ms": median(timings),
+        "min_ms": min(timings),
+    }
+
+
+# Statements of entry points, each timed in a fresh interpreter
+STARTUP_STATEMENTS = {
+    "python": "pass",
+    "import_engine": "import apex_ocr.engine",
+    "import_pipeline": "import apex_ocr.pipeline",
+    "import_utils": "import apex_ocr.utils",
+    "stub_engine": (
+        "from apex_ocr.backends import StubBackend;"
+        "from apex_ocr.engine import ApexOCREngine;"
+        "ApexOCREngine(database=False, backend=StubBackend())"
+    ),
+}
+
+
+def benchmark_startup(repeat: int) -> Dict[str, Dict[str, float]]:
+    return {
+        name: time_stage(
+            lambda: subprocess.run(
+                [sys.executable, "-c", statement],
+                check=True,
+                cwd=Path(__file__).parent.parent,
+            ),
+            repeat,
+        )
+        for name, statement in STARTUP_STATEMENTS.items()
+    }
+
+
+def vote(engine: ApexOCREngine, keys: List[str], texts: list) -> dict:
+    # Same tally, parsing and majority vote as a squad summary page
+    votes, _ = engine.count_votes(keys, texts)
+
+    matches = defaultdict(list)
+    for key, counts in votes.items():
+        for text, count in counts.items():
+            for _ in range(count):
+                engine.parse_squad_summary_text(key, text, matches)
+
+    return {k: Counter(v).most_common(1)[0][0] for k, v in matches.items()}
+
+
+def create_engine(use_paddleocr: bool) -> ApexOCREngine:
+    engine = ApexOCREngine(
+        database=False,
+        parallel=False,
+        backend=None if use_paddleocr else StubBackend(),
+    )
+
+    # Start from scratch rather than from what was learned on real screenshots
+    if engine.digit_recognizer is not None:
+        engine.digit_recognizer = DigitRecognizer(glyphs_file=None)
+    engine.summary_gate = None
+
+    return engine
+
+
+def benchmark_screen(
+    engine: ApexOCREngine, screen: SyntheticScreen, repeat: int
+) -> dict:
+    image = screen.image
+    layout = screen.layout
+    stages = {}
+
+    stages["scale_rois_cold"] = time_stage(
+        lambda: (get_roi_layout.cache_clear(), scale_rois(image.size)), repeat
+    )
+    stages["scale_rois"] = time_stage(lambda: scale_rois(image.size), repeat)
+    stages["get_rois"] = time_stage(lambda: get_rois(image, layout), repeat)
+
+    # Crop and preprocess each region separately for every pass
+    stages["preprocess_image"] = time_stage(
+        lambda: [
+            preprocess_image(np.array(image.crop(box)), b)
+            for box in layout.boxes.values()
+            for b in engine.blurs
+        ],
+        repeat,
+    )
+
+    def preprocess_frame():
+        frame = engine.get_frame_preprocessor(image, layout)
+        return [
+            frame.preprocess(box, b)
+            for box in layout.boxes.values()
+            for b in engine.blurs
+        ]
+
+    stages["preprocess_frame"] = time_stage(preprocess_frame, repeat)
+
+    keys = [key for key in layout.boxes for _ in engine.blurs]
+    images = preprocess_frame()
+    stages["ocr"] = time_stage(
+        lambda: (
+            engine.ocr_cache.clear(),
+            engine.texts_from_images(images),
+        ),
+        repeat,
+    )
+    stages["ocr_cached"] = time_stage(lambda: engine.texts_from_images(images), repeat)
+
+    texts = engine.texts_from_images(images)
+    stages["voting"] = time_stage(lambda: vote(engine, keys, texts), repeat)
+
+    # Warm up once so that the digit templates are calibrated
+    results = engine.ocr_screenshot(image)
+
+    stages["squad_summary_page"] = time_stage(
+        lambda: (
+            engine.ocr_cache.clear(),
+            engine.process_squad_summary_page(image, layout),
+        ),
+        repeat,
+    )
+    stages["ocr_screenshot"] = time_stage(
+        lambda: (engine.ocr_cache.clear(), engine.ocr_screenshot(image)), repeat
+    )
+    stages["hashing"] = time_stage(
+        lambda: utils.hash_dict(engine.reformat_results(results)), repeat
+    )
+
+    with TemporaryDirectory() as temp_dir:
+        writer = CsvResultWriter(
+            Path(temp_dir) / "squad_stats.csv", engine.squad_summary_headers
+        )
+
+        # Every result needs a distinct hash to be written
+        csv_hashes = (f"{results.get('Hash')}-{i}" for i in itertools.count())
+        stages["csv_write"] = time_stage(
+            lambda: writer.write({**results, "Hash": next(csv_hashes)}), repeat
+        )
+        writer.close()
+
+    db_conn = ApexDatabaseApi("sqlite://")
+    Base.metadata.create_all(db_conn.engine)
+
+    # Every match needs a distinct hash to be inserted
+    hashes = (f"{results.get('Hash')}-{i}" for i in itertools.count())
+    stages["db_push"] = time_stage(
+        lambda: db_conn.push_results({**results, "Hash": next(hashes)}), repeat
+    )
+
+    correct = [
+        field for field, value in screen.results.items() if results.get(field) == value
+    ]
+
+    return {
+        "stages": stages,
+        "fields_correct": len(correct),
+        "fields": len(screen.results),
+        "ocr_cache": engine.ocr_cache.stats(),
+        "identity_cache": db_conn.player_ids.stats(),
+    }
+
+
+def get_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@click.command()
+@click.option(
+    "-r",
+    "--resolution",
+    "resolutions",
+    type=click.Choice(list(RESOLUTIONS)),
+    multiple=True,
+    default=list(RESOLUTIONS),
+    show_default=True,
+)
+@click.option("-n", "--repeat", type=int, show_default=True, default=20)
+@click.option("-s", "--seed", type=int, show_default=True, default=0)
+@click.option(
+    "--startup-repeat",
+    type=int,
+    show_default=True,
+    default=5,
+    help="Number of interpreters started to time imports, 0 to skip",
+)
+@click.option(
+    "--paddleocr",
+    "use_paddleocr",
+    is_flag=True,
+    default=False,
+    help="Use the PaddleOCR model instead of the stub",
+)
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write JSON results to a file instead of stdout",
+)
+def benchmark_stages(
+    resolutions: List[str],
+    repeat: int,
+    seed: int,
+    startup_repeat: int,
+    use_paddleocr: bool,
+    output: Optional[Path],
+) -> None:
+    """Time each stage of processing synthetic squad summary screenshots."""
+    report = {
+        "commit": get_commit(),
+        "datetime": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ocr": "paddleocr" if use_paddleocr else "stub",
+        "repeat": repeat,
+        "seed": seed,
+        "resolutions": {},
+    }
+
+    if startup_repeat > 0:
+        report["startup"] = benchmark_startup(startup_repeat)
+
+    for resolution in resolutions:
+        screen = render_screen(*RESOLUTIONS[resolution], seed=seed)
+
+        engine = create_engine(use_paddleocr)
+        if not use_paddleocr:
+            register_screen(engine.backend, engine, screen)
+
+        report["resolutions"][resolution] = benchmark_screen(engine, screen, repeat)
+
+    report_json = json.dumps(report, indent=2, default=str)
+
+    if output is None:
+        print(report_json)
+    else:
+        output.write_text(report_json)
+
+
+if __name__ == "__main__":
+    benchmark_stages()
@@ -0,0 +1,151 @@
+import random
+import string
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from apex_ocr.backends import StubBackend
+from apex_ocr.engine import ApexOCREngine
+from apex_ocr.preprocessing import preprocess_image
+from apex_ocr.roi import RoiLayout, get_roi_layout
+
+RESOLUTIONS = {
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "4k": (3840, 2160),
+}
+
+BACKGROUND_COLOR = (18, 22, 30)
+TEXT_COLOR = (235, 235, 235)
+
+
+@dataclass
+class SyntheticScreen:
+    image: Image.Image
+    layout: RoiLayout
+    # Normalized OCR text of every region
+    texts: Dict[str, str]
+    # Expected results of the squad summary page, without datetime and hash
+    results: dict
+
+
+def random_name(rng: random.Random, min_length: int, max_length: int) -> str:
+    length = rng.randint(min_length, max_length)
+    return "".join(rng.choices(string.ascii_lowercase + string.digits, k=length))
+
+
+def random_stats(rng: random.Random) -> Tuple[Dict[str, str], dict]:
+    texts = {"summary": "squadsummary", "total_kills": "totalkills"}
+    results = {"Place": rng.randint(1, 20)}
+    texts["squad_place"] = f"#{results['Place']}"
+
+    for player in ["P1", "P2", "P3"]:
+        clan_tag = random_name(rng, 3, 4) if rng.random() < 0.5 else ""
+        player_name = random_name(rng, 4, 10)
+        kills, assists, knocks = (rng.randint(0, 9) for _ in range(3))
+        damage = rng.randint(0, 3000)
+        minutes, seconds = rng.randint(0, 25), rng.randint(0, 59)
+        revives, respawns = rng.randint(0, 5), rng.randint(0, 3)
+
+        texts[f"{player} player"] = (
+            f"[{clan_tag}]{player_name}" if clan_tag else player_name
+        )
+        texts[f"{player} kakn"] = f"{kills}/{assists}/{knocks}"
+        texts[f"{player} damage"] = str(damage)
+        texts[f"{player} survival_time"] = f"{minutes}:{seconds:02d}"
+        texts[f"{player} revives"] = str(revives)
+        texts[f"{player} respawns"] = str(respawns)
+
+        results[player] = player_name
+        results[f"{player} Clan"] = clan_tag
+        results[f"{player} Kills"] = kills
+        results[f"{player} Assists"] = assists
+        results[f"{player} Knocks"] = knocks
+        results[f"{player} Damage"] = damage
+        results[f"{player} Time Survived"] = f"{minutes}:{seconds:02d}"
+        results[f"{player} Revives"] = revives
+        results[f"{player} Respawns"] = respawns
+
+    results["Squad Kills"] = sum(
+        results[f"{player} Kills"] for player in ["P1", "P2", "P3"]
+    )
+
+    return texts, results
+
+
+def get_font(size: int) -> ImageFont.ImageFont:
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Bitmap font of older Pillow versions
+        return ImageFont.load_default()
+
+
+def render_screen(width: int, height: int, seed: int = 0) -> SyntheticScreen:
+    """Render a squad summary screen with random stats.
+
+    Args:
+        width (int): Screen width.
+        height (int): Screen height.
+        seed (int, optional): Seed of the random stats. Defaults to 0.
+
+    Returns:
+        SyntheticScreen: Rendered screen with its expected texts and results.
+    """
+    rng = random.Random(seed)
+    layout = get_roi_layout(width, height)
+    texts, results = random_stats(rng)
+    image = draw_screen(layout, texts)
+
+    return SyntheticScreen(image=image, layout=layout, texts=texts, results=results)
+
+
+def draw_screen(layout: RoiLayout, texts: Dict[str, str]) -> Image.Image:
+    """Draw the text of every region of a squad summary screen.
+
+    Args:
+        layout (RoiLayout): Layout of the screen.
+        texts (Dict[str, str]): Normalized text of every region.
+
+    Returns:
+        Image.Image: Drawn screen.
+    """
+    image = Image.new("RGB", (layout.width, layout.height), BACKGROUND_COLOR)
+    draw = ImageDraw.Draw(image)
+
+    boxes = dict(layout.boxes)
+    boxes["summary"] = layout.summary
+    boxes["total_kills"] = layout.total_kills
+
+    display_texts = dict(texts)
+    display_texts["summary"] = "SQUAD SUMMARY"
+    display_texts["total_kills"] = "TOTAL KILLS"
+
+    for key, box in boxes.items():
+        box_height = box[3] - box[1]
+        font_size = max(8, box_height * 2 // 3)
+        draw.text(
+            (box[0] + font_size // 4, box[1] + (box_height - font_size) // 2),
+            display_texts[key],
+            fill=TEXT_COLOR,
+            font=get_font(font_size),
+        )
+
+    return image
+
+
+def register_screen(
+    stub: StubBackend, engine: ApexOCREngine, screen: SyntheticScreen
+) -> None:
+    # Register the text of every preprocessed image the engine can ask for
+    frame = engine.get_frame_preprocessor(screen.image, screen.layout)
+    for key, box in screen.layout.boxes.items():
+        for blur_amount in set(engine.blurs):
+            stub.register(frame.preprocess(box, blur_amount), screen.texts[key])
+
+    # Images used to classify the page
+    for key in ["summary", "total_kills"]:
+        image = np.array(screen.image.crop(getattr(screen.layout, key)))
+        stub.register(preprocess_image(image, 3), screen.texts[key])
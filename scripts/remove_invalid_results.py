@@ -3,7 +3,7 @@ from pathlib import Path
 import click
 import pandas as pd
 
-from apex_ocr.engine import ApexOCREngine
+from apex_ocr.utils import is_valid_results
 
 
 @click.command()
@@ -16,9 +16,7 @@ def remove_invalid_results(filepath: Path) -> None:
     if filepath.exists() and filepath.suffix == ".csv":
         results_df = pd.read_csv(filepath)
         results_df = results_df[
-            results_df.apply(
-                lambda row: ApexOCREngine.is_valid_results(row.to_dict()), axis=1
-            )
+            results_df.apply(lambda row: is_valid_results(row.to_dict()), axis=1)
         ]
         results_df.to_csv(filepath, index=False)
 
@@ -0,0 +1,58 @@
+import logging
+
+import click
+import uvicorn
+from rich.logging import RichHandler
+
+from apex_ocr.config import (
+    SERVER_BATCHING,
+    SERVER_HOST,
+    SERVER_PORT,
+    make_directories,
+)
+from apex_ocr.service import EnginePool
+from apex_ocr.webapp import create_app
+
+logging.captureWarnings(True)
+logger = logging.getLogger(__name__)
+
+
+@click.command()
+@click.option("--host", show_default=True, default=SERVER_HOST)
+@click.option("--port", type=int, show_default=True, default=SERVER_PORT)
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(min=1),
+    show_default=True,
+    default=1,
+    help="Number of requests processed at once",
+)
+@click.option(
+    "--batching/--no-batching",
+    show_default=True,
+    default=SERVER_BATCHING,
+    help="Share one model and batch the recognitions of concurrent requests, "
+    "instead of loading a model for every worker",
+)
+@click.option("-d", "--debug", is_flag=True, show_default=True, default=False)
+def main(host: str, port: int, workers: int, batching: bool, debug: bool):
+    app = create_app(EnginePool(workers, debug, batching=batching))
+    uvicorn.run(app, host=host, port=port, log_config=None)
+
+
+if __name__ == "__main__":
+    make_directories()
+
+    # Configure logger
+    logging.basicConfig(
+        level=logging.INFO,
+        format=" %(name)s | %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+        force=True,
+        handlers=[
+            RichHandler(omit_repeated_times=False, rich_tracebacks=True),
+        ],
+    )
+
+    main()
@@ -60,4 +60,5 @@ setup(
     packages=find_packages(),
     include_package_data=True,
     install_requires=REQUIREMENTS,
+    extras_require={"parquet": ["pyarrow>=12.0.0"]},
 )
@@ -0,0 +1,44 @@
+import random
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# Synthetic screens are shared with the benchmarks
+sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+
+from synthetic import random_stats  # noqa: E402
+
+import apex_ocr.engine  # noqa: E402
+from apex_ocr.backends import StubBackend  # noqa: E402
+from apex_ocr.digits import DigitRecognizer  # noqa: E402
+from apex_ocr.engine import ApexOCREngine  # noqa: E402
+from apex_ocr.writer import close_result_writers  # noqa: E402
+
+
+@pytest.fixture
+def data_directory(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    # Keep the outputs of the tests out of the data directory of the repo
+    monkeypatch.setattr(apex_ocr.engine, "make_directories", lambda: None)
+    monkeypatch.setattr(apex_ocr.engine, "SQUAD_STATS_FILE", tmp_path / "stats.csv")
+    monkeypatch.setattr(apex_ocr.engine, "PARQUET_OUTPUT", False)
+    yield tmp_path
+    close_result_writers()
+
+
+@pytest.fixture
+def stub_engine(data_directory: Path) -> ApexOCREngine:
+    engine = ApexOCREngine(database=False, parallel=False, backend=StubBackend())
+    if engine.digit_recognizer is not None:
+        engine.digit_recognizer = DigitRecognizer(glyphs_file=None)
+    engine.summary_gate = None
+    return engine
+
+
+@pytest.fixture
+def results_dict() -> dict:
+    _, results = random_stats(random.Random(0))
+    results["Datetime"] = datetime(2023, 1, 1, 12)
+    results["Hash"] = "0123456789abcdef"
+    return results
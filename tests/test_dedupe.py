@@ -0,0 +1,48 @@
+import io
+from pathlib import Path
+
+from PIL import Image
+from synthetic import draw_screen, render_screen
+
+from apex_ocr.dedupe import DuplicateIndex, screenshot_fingerprint
+from apex_ocr.fingerprint import hamming_distance
+
+
+def reencode(image: Image.Image) -> Image.Image:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=75)
+    return Image.open(buffer).convert("RGB")
+
+
+def test_screens_that_differ_by_one_digit_are_not_duplicates(tmp_path: Path) -> None:
+    screen = render_screen(1920, 1080, seed=3)
+    texts = dict(screen.texts)
+    texts["P2 damage"] = texts["P2 damage"][:-1] + str(
+        (int(texts["P2 damage"][-1]) + 1) % 10
+    )
+    other_match = draw_screen(screen.layout, texts)
+
+    fingerprint = screenshot_fingerprint(screen.image)
+    other_fingerprint = screenshot_fingerprint(other_match)
+
+    index = DuplicateIndex(tmp_path / "fingerprints.db")
+    index.add(fingerprint, tmp_path / "match.png", "hash")
+
+    # Close enough to the first match for the difference hash alone
+    assert (
+        hamming_distance(fingerprint.frame_hash, other_fingerprint.frame_hash)
+        <= index.max_distance
+    )
+    assert index.find(other_fingerprint) is None
+    assert not index.is_duplicate(fingerprint, other_fingerprint)
+
+    # A re-encoded copy of the first match is still a duplicate
+    copy_fingerprint = screenshot_fingerprint(reencode(screen.image))
+    assert index.find(copy_fingerprint) == str((tmp_path / "match.png").resolve())
+
+    # Thumbnails are read back from the index file
+    index.close()
+    index = DuplicateIndex(tmp_path / "fingerprints.db")
+    assert index.find(other_fingerprint) is None
+    assert index.find(copy_fingerprint) is not None
+    index.close()
@@ -0,0 +1,31 @@
+from unittest.mock import Mock
+
+import pytest
+
+from apex_ocr.engine import ApexOCREngine
+
+
+def test_save_results_retries_failed_writes(
+    stub_engine: ApexOCREngine, results_dict: dict
+) -> None:
+    stub_engine.db_conn = Mock()
+    stub_engine.db_conn.push_results.side_effect = [ConnectionError, None]
+
+    with pytest.raises(ConnectionError):
+        stub_engine.save_results(results_dict)
+
+    assert stub_engine.save_results(results_dict)
+    assert stub_engine.db_conn.push_results.call_count == 2
+
+    stub_engine.flush_results()
+    assert stub_engine.results_written(results_dict["Hash"])
+
+
+def test_save_results_skips_handled_results(
+    stub_engine: ApexOCREngine, results_dict: dict
+) -> None:
+    stub_engine.db_conn = Mock()
+
+    assert stub_engine.save_results(results_dict)
+    assert not stub_engine.save_results(results_dict)
+    stub_engine.db_conn.push_results.assert_called_once_with(results_dict)
@@ -0,0 +1,29 @@
+from pathlib import Path
+
+import pytest
+
+import apex_ocr.manifest
+from apex_ocr.manifest import ScreenshotManifest, ScreenshotStatus, file_digest
+
+
+def test_unprocessed_files_are_hashed_once(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    screenshot_path = tmp_path / "screenshot.png"
+    screenshot_path.write_bytes(b"screenshot")
+
+    digests = []
+
+    def counting_file_digest(path: Path) -> str:
+        digests.append(path)
+        return file_digest(path)
+
+    monkeypatch.setattr(apex_ocr.manifest, "file_digest", counting_file_digest)
+
+    manifest = ScreenshotManifest(tmp_path / "manifest.db")
+    assert manifest.unprocessed([screenshot_path]) == [screenshot_path]
+    manifest.record(screenshot_path, ScreenshotStatus.NO_RESULTS, {})
+
+    assert manifest.unprocessed([screenshot_path]) == []
+    assert digests == [screenshot_path]
+    manifest.close()
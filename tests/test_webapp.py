@@ -0,0 +1,56 @@
+import json
+import socket
+import threading
+import time
+from unittest.mock import Mock
+
+import httpx
+import pytest
+import uvicorn
+
+from apex_ocr.webapp import create_app
+
+
+@pytest.fixture
+def server_url() -> str:
+    # Engines are never reached by uploads the server rejects
+    pool = Mock(n_engines=1, ready=threading.Event())
+    pool.ready.set()
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(
+        uvicorn.Config(create_app(pool), port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    while not server.started:
+        time.sleep(0.01)
+
+    yield f"http://127.0.0.1:{port}"
+
+    server.should_exit = True
+    thread.join()
+
+
+def test_upload_files_with_broken_boundary(server_url: str) -> None:
+    body = (
+        b"--other\r\n"
+        b'Content-Disposition: form-data; name="files"; filename="a.png"\r\n'
+        b"Content-Type: image/png\r\n\r\n"
+        b"not an image\r\n"
+        b"--other--\r\n"
+    )
+    response = httpx.post(
+        f"{server_url}/uploadfiles/",
+        content=body,
+        headers={"Content-Type": "multipart/form-data; boundary=boundary"},
+    )
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 1
+    assert lines[0]["error"].startswith("Malformed upload")